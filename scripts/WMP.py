@@ -1,9 +1,24 @@
 from numbers import Integral, Real
 from math import exp, erf, pi, sqrt
+from collections import OrderedDict
 from collections.abc import Iterable
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import glob
+import hashlib
+import os
+import re
+import tempfile
+import time
+import warnings
 
 import h5py
 import numpy as np
+from scipy import sparse, special
+try:
+    import numba
+except ImportError:
+    numba = None
 
 # Version of WMP nuclear data format
 WMP_VERSION_MAJOR = 1
@@ -26,6 +41,57 @@ _FIT_S = 0       # Scattering
 _FIT_A = 1       # Absorption
 _FIT_F = 2       # Fission
 
+# Element symbols by atomic number, used to name library files
+ATOMIC_SYMBOL = {
+    0: 'n', 1: 'H', 2: 'He', 3: 'Li', 4: 'Be', 5: 'B', 6: 'C', 7: 'N', 8: 'O',
+    9: 'F', 10: 'Ne', 11: 'Na', 12: 'Mg', 13: 'Al', 14: 'Si', 15: 'P', 16: 'S',
+    17: 'Cl', 18: 'Ar', 19: 'K', 20: 'Ca', 21: 'Sc', 22: 'Ti', 23: 'V',
+    24: 'Cr', 25: 'Mn', 26: 'Fe', 27: 'Co', 28: 'Ni', 29: 'Cu', 30: 'Zn',
+    31: 'Ga', 32: 'Ge', 33: 'As', 34: 'Se', 35: 'Br', 36: 'Kr', 37: 'Rb',
+    38: 'Sr', 39: 'Y', 40: 'Zr', 41: 'Nb', 42: 'Mo', 43: 'Tc', 44: 'Ru',
+    45: 'Rh', 46: 'Pd', 47: 'Ag', 48: 'Cd', 49: 'In', 50: 'Sn', 51: 'Sb',
+    52: 'Te', 53: 'I', 54: 'Xe', 55: 'Cs', 56: 'Ba', 57: 'La', 58: 'Ce',
+    59: 'Pr', 60: 'Nd', 61: 'Pm', 62: 'Sm', 63: 'Eu', 64: 'Gd', 65: 'Tb',
+    66: 'Dy', 67: 'Ho', 68: 'Er', 69: 'Tm', 70: 'Yb', 71: 'Lu', 72: 'Hf',
+    73: 'Ta', 74: 'W', 75: 'Re', 76: 'Os', 77: 'Ir', 78: 'Pt', 79: 'Au',
+    80: 'Hg', 81: 'Tl', 82: 'Pb', 83: 'Bi', 84: 'Po', 85: 'At', 86: 'Rn',
+    87: 'Fr', 88: 'Ra', 89: 'Ac', 90: 'Th', 91: 'Pa', 92: 'U', 93: 'Np',
+    94: 'Pu', 95: 'Am', 96: 'Cm', 97: 'Bk', 98: 'Cf', 99: 'Es', 100: 'Fm'}
+
+# Library file names are ZZZAAA.h5, with an mN suffix for metastable states
+_WMP_FILENAME = re.compile(r'^(\d{3})(\d{3})(?:m(\d+))?\.h5$')
+
+# Accepted values of WindowedMultipole.faddeeva_mode
+_FADDEEVA_MODES = ('exact', 'fast')
+_DTYPES = ('float64', 'float32')
+
+# Interpolation variables of TemperatureTable and their inverses.
+_TEMPERATURE_INTERPOLATION = {'sqrt': (np.sqrt, np.square),
+                              'log': (np.log, np.exp)}
+
+
+def _gauss_hermite_pairs(n):
+    """Return the (t**2, 2*weight/pi) pairs of the positive nodes of an
+    n-point Gauss-Hermite rule, used by :func:`_faddeeva_fast_array`."""
+    t, weight = np.polynomial.hermite.hermgauss(n)
+    positive = t > 0
+    return tuple(zip((t[positive]**2).tolist(),
+                     (2.0 * weight[positive] / pi).tolist()))
+
+# Gauss-Hermite quadratures of the Faddeeva integral.  Relative to wofz, the
+# 4-point rule is accurate to ~1.2e-6 for |z| >= 6 and the 8-point rule to
+# ~1.2e-6 for |z| >= 4.
+_GH4 = _gauss_hermite_pairs(4)
+_GH8 = _gauss_hermite_pairs(8)
+_FAST_R2_GH4 = 36.0
+_FAST_R2_GH8 = 16.0
+# Below this many arguments, e.g. the poles of one window, the fast Faddeeva
+# evaluation costs more in NumPy calls than wofz costs in work per argument.
+_FAST_MIN_SIZE = 512
+
+# Number of (energy, pole) pairs evaluated at once by the chunked evaluators.
+_CHUNK_PAIRS = 2**18
+
 def check_type(name, value, expected_type):
     r"""Ensure that an object is of an expected type.
 
@@ -95,6 +161,58 @@ def check_greater_than(name, value, minimum, equality=False):
                   'or equal to "{2}"'.format(name, value, minimum)
             raise ValueError(msg)
 
+def check_less_than(name, value, maximum, equality=False):
+    r"""Ensure that an object's value is less than a given value.
+
+    Parameters
+    ----------
+    name : str
+        Description of the value being checked
+    value : object
+        Object to check
+    maximum : object
+        Maximum value to check against
+    equality : bool, optional
+        Whether equality is allowed. Defaults to False.
+
+    """
+
+    if equality:
+        if value > maximum:
+            msg = 'Unable to set "{0}" to "{1}" since it is greater than ' \
+                  '"{2}"'.format(name, value, maximum)
+            raise ValueError(msg)
+    else:
+        if value >= maximum:
+            msg = 'Unable to set "{0}" to "{1}" since it is greater than ' \
+                  'or equal to "{2}"'.format(name, value, maximum)
+            raise ValueError(msg)
+
+def _faddeeva_array(z):
+    r"""Evaluate the complex Faddeeva function for an array of arguments.
+
+    This is the array counterpart of :func:`_faddeeva` and evaluates the same
+    integral form of the Faddeeva function element-wise.  Arguments in the
+    lower half-plane are reflected into the upper half-plane with a mask so
+    that :func:`scipy.special.wofz` is called only once for the whole array.
+
+    Parameters
+    ----------
+    z : numpy.ndarray
+        Complex arguments to the Faddeeva function.
+
+    Returns
+    -------
+    numpy.ndarray
+        :math:`\frac{i}{\pi} \int_{-\infty}^{\infty} \frac{1}{z - t}
+        \exp(-t^2) \text{d}t` for each element of `z`.
+
+    """
+    lower = ~(np.angle(z) > 0)
+    w = special.wofz(np.where(lower, np.conj(z), z))
+    return np.where(lower, -np.conj(w), w)
+
+
 def _faddeeva(z):
     r"""Evaluate the complex Faddeeva function.
 
@@ -134,11 +252,98 @@ def _faddeeva(z):
         \text{d}t`
 
     """
-    from scipy.special import wofz
     if np.angle(z) > 0:
-        return wofz(z)
+        return special.wofz(z)
     else:
-        return -np.conj(wofz(z.conjugate()))
+        return -np.conj(special.wofz(z.conjugate()))
+
+
+def _gauss_hermite_faddeeva(z, rule):
+    r"""Evaluate a Gauss-Hermite quadrature of the Faddeeva integral.
+
+    The quadrature of :math:`\frac{i}{\pi} \int_{-\infty}^{\infty}
+    \frac{1}{z - t} \exp(-t^2) \text{d}t` with symmetric nodes :math:`\pm
+    t_k` is :math:`i z \sum_k \frac{c_k}{z^2 - t_k^2}`.  This form satisfies
+    the same half-plane reflection as the integral, so it applies directly to
+    arguments in either half-plane.
+
+    Parameters
+    ----------
+    z : complex or numpy.ndarray
+        Arguments to the Faddeeva function.
+    rule : tuple of 2-tuple of float
+        Pairs of :math:`t_k^2` and :math:`c_k` from
+        :func:`_gauss_hermite_pairs`.
+
+    Returns
+    -------
+    complex or numpy.ndarray
+        Approximation of the Faddeeva function at `z`.
+
+    """
+    z2 = z * z
+    total = 0.0
+    for t2, c in rule:
+        total = total + c / (z2 - t2)
+    return 1j * z * total
+
+
+def _faddeeva_fast_array(z, scale=1.0):
+    r"""Approximate the complex Faddeeva function for an array of arguments.
+
+    Arguments far from the origin are evaluated with Gauss-Hermite rational
+    approximations, the 4-point rule for :math:`|z| \geq 6` and the 8-point
+    rule for :math:`4 \leq |z| < 6`.  These agree with
+    :func:`_faddeeva_array` to about 1.2e-6 relative error.  Arguments with
+    :math:`|z| < 4` are passed to :func:`_faddeeva_rational_array`, and so
+    are all arguments if at least three quarters of them are that close.
+    Arrays of fewer than 512 arguments, such as the poles of one window in
+    :meth:`WindowedMultipole._evaluate`, are passed to :func:`_faddeeva_array`
+    as a whole, which is faster than either approximation at that size.
+
+    Parameters
+    ----------
+    z : numpy.ndarray
+        Complex arguments to the Faddeeva function.
+    scale : Real
+        Positive factor the arguments are multiplied by, see
+        :func:`_faddeeva_rational_array`.
+
+    Returns
+    -------
+    numpy.ndarray
+        Approximation of :math:`\frac{i}{\pi} \int_{-\infty}^{\infty}
+        \frac{1}{z - t} \exp(-t^2) \text{d}t` for each element of
+        ``scale * z``.
+
+    """
+    z = np.asarray(z, dtype=complex)
+    if z.size < _FAST_MIN_SIZE:
+        return _faddeeva_array(z * scale)
+    shape = z.shape
+    z = z.ravel()
+
+    r2 = z.real**2
+    r2 += z.imag**2
+    r2 *= scale * scale
+    inner = r2 < _FAST_R2_GH8
+
+    # At high temperatures most arguments are near the origin, and splitting
+    # them up by rule costs more than evaluating the rational approximation
+    # for all of them.
+    if 4 * np.count_nonzero(inner) > 3 * z.size:
+        return _faddeeva_rational_array(z, scale).reshape(shape)
+
+    # Otherwise each rule is only evaluated for the arguments it is used for.
+    w = np.empty_like(z)
+    far = r2 >= _FAST_R2_GH4
+    i_far = np.flatnonzero(far)
+    i_mid = np.flatnonzero(~(far | inner))
+    i_inner = np.flatnonzero(inner)
+    w[i_far] = _gauss_hermite_faddeeva(z[i_far] * scale, _GH4)
+    w[i_mid] = _gauss_hermite_faddeeva(z[i_mid] * scale, _GH8)
+    w[i_inner] = _faddeeva_rational_array(z[i_inner], scale)
+    return w.reshape(shape)
 
 
 def _broaden_wmp_polynomials(E, dopp, n):
@@ -199,18 +404,357 @@ def _broaden_wmp_polynomials(E, dopp, n):
     return factors
 
 
+def _broaden_wmp_polynomials_array(E, dopp, n, derivative=False):
+    r"""Evaluate Doppler-broadened windowed multipole curvefit for an array of
+    energies.
+
+    This is the array counterpart of :func:`_broaden_wmp_polynomials`.  The
+    shortcut for :math:`\beta > 6` is applied with a mask.  The derivative
+    with respect to `dopp` is obtained by differentiating the recursion.
+
+    Parameters
+    ----------
+    E : numpy.ndarray
+        1D array of energies to evaluate at.
+    dopp : Real or numpy.ndarray
+        sqrt(atomic weight ratio / kT) in units of eV, either one value for all
+        energies or one value per energy.
+    n : Integral
+        Number of components to the polynomial.
+    derivative : bool
+        Whether to also return the derivatives with respect to `dopp`.
+
+    Returns
+    -------
+    numpy.ndarray
+        A (len(E), n) array of the value of each Doppler-broadened curvefit
+        polynomial term at each energy.
+    numpy.ndarray
+        Only if `derivative` is set, a (len(E), n) array of their derivatives
+        with respect to `dopp`.
+
+    """
+    E, dopp = np.broadcast_arrays(np.asarray(E, dtype=float),
+                                  np.asarray(dopp, dtype=float))
+    sqrtE = np.sqrt(E)
+    beta = sqrtE * dopp
+    half_inv_dopp2 = 0.5 / dopp**2
+    quarter_inv_dopp4 = half_inv_dopp2**2
+
+    # ERF(6) is 1 and beta/sqrtpi*exp(-beta**2) is 0 to machine precision, so
+    # only evaluate them below that.
+    erf_beta = np.ones_like(beta)
+    exp_m_beta2 = np.zeros_like(beta)
+    small = np.flatnonzero(beta <= 6.0)
+    erf_beta[small] = special.erf(beta[small])
+    exp_m_beta2[small] = np.exp(-beta[small]**2)
+
+    factors = np.empty((E.shape[0], n))
+
+    factors[:, 0] = erf_beta / E
+    factors[:, 1] = 1.0 / sqrtE
+    factors[:, 2] = (factors[:, 0] * (half_inv_dopp2 + E)
+                     + exp_m_beta2 / (beta * sqrt(pi)))
+
+    # Perform recursive broadening of high order components, as in
+    # _broaden_wmp_polynomials.
+    for i in range(1, n-2):
+        if i != 1:
+            factors[:, i+2] = (-factors[:, i-2] * (i - 1.0) * i
+                               * quarter_inv_dopp4 + factors[:, i]
+                               * (E + (1.0 + 2.0 * i) * half_inv_dopp2))
+        else:
+            factors[:, i+2] = factors[:, i] * (E + (1.0 + 2.0 * i)
+                                               * half_inv_dopp2)
+
+    if not derivative:
+        return factors
+
+    # Differentiate each term of the recursion with respect to dopp, using
+    # d(half_inv_dopp2)/d(dopp) = -2 half_inv_dopp2/dopp and
+    # d(quarter_inv_dopp4)/d(dopp) = -4 quarter_inv_dopp4/dopp.
+    d_half_inv_dopp2 = -2.0 * half_inv_dopp2 / dopp
+    d_quarter_inv_dopp4 = -4.0 * quarter_inv_dopp4 / dopp
+
+    dfactors = np.empty((E.shape[0], n))
+
+    dfactors[:, 0] = 2.0 / sqrt(pi) * exp_m_beta2 * sqrtE / E
+    dfactors[:, 1] = 0.0
+    dfactors[:, 2] = (dfactors[:, 0] * (half_inv_dopp2 + E)
+                      + factors[:, 0] * d_half_inv_dopp2
+                      - exp_m_beta2 * (2.0 * beta**2 + 1.0) * sqrtE
+                      / (beta**2 * sqrt(pi)))
+
+    for i in range(1, n-2):
+        dfactors[:, i+2] = (dfactors[:, i] * (E + (1.0 + 2.0 * i)
+                                              * half_inv_dopp2)
+                            + factors[:, i] * (1.0 + 2.0 * i)
+                            * d_half_inv_dopp2)
+        if i != 1:
+            dfactors[:, i+2] -= (dfactors[:, i-2] * quarter_inv_dopp4
+                                 + factors[:, i-2] * d_quarter_inv_dopp4
+                                 ) * (i - 1.0) * i
+
+    return factors, dfactors
+
+
+def _weideman_coefficients(n):
+    """Coefficients of Weideman's rational approximation of the Faddeeva
+    function with n terms.
+
+    See J. A. C. Weideman, "Computation of the complex error function." SIAM
+    Journal on Numerical Analysis 31.5 (1994): 1497-1518.
+
+    Returns
+    -------
+    a : numpy.ndarray
+        Polynomial coefficients, highest power first.
+    L : float
+        Scale of the approximation.
+
+    """
+    M = 2 * n
+    L = sqrt(n / sqrt(2.0))
+    theta = np.arange(-M + 1, M) * pi / M
+    t = L * np.tan(theta / 2.0)
+    f = np.concatenate(([0.0], np.exp(-t**2) * (L**2 + t**2)))
+    a = np.real(np.fft.fft(np.fft.fftshift(f))) / (2 * M)
+    return np.ascontiguousarray(a[n:0:-1]), L
+
+
+# 36 terms are accurate to about 2e-14 relative in the upper half plane.
+_WEIDEMAN_A, _WEIDEMAN_L = _weideman_coefficients(36)
+_INV_SQRT_PI = 1.0 / sqrt(pi)
+
+
+def _jit(func):
+    """Compile a function with numba if it is installed."""
+    if numba is None:
+        return func
+    return numba.njit(cache=True)(func)
+
+
+@_jit
+def _faddeeva_kernel(z):
+    """Integral form of the Faddeeva function, see :func:`_faddeeva`, by
+    Weideman's rational approximation instead of :func:`scipy.special.wofz`
+    so that it can be compiled."""
+    lower = not (z.imag > 0.0 or (z.imag == 0.0 and z.real < 0.0))
+    if lower:
+        z = z.conjugate()
+    iz = 1j * z
+    d = 1.0 / (_WEIDEMAN_L - iz)
+    Z = (_WEIDEMAN_L + iz) * d
+    p = 0j
+    for a in _WEIDEMAN_A:
+        p = p * Z + a
+    w = 2.0 * p * d * d + _INV_SQRT_PI * d
+    if lower:
+        return -w.conjugate()
+    return w
+
+
+def _faddeeva_rational_array(z, scale=1.0):
+    r"""Evaluate the complex Faddeeva function for an array of arguments with
+    Weideman's rational approximation.
+
+    This is the array counterpart of :func:`_faddeeva_kernel`.  The 36-term
+    approximation agrees with :func:`_faddeeva_array` to about 4e-14 relative
+    error over the whole plane, i.e. to round-off for cross sections, and
+    costs a handful of array operations per term instead of a
+    :func:`scipy.special.wofz` call per element.
+
+    Parameters
+    ----------
+    z : numpy.ndarray
+        Complex arguments to the Faddeeva function.
+    scale : Real
+        Positive factor the arguments are multiplied by, which saves a
+        temporary array when they are e.g. :math:`(\sqrt{E} - p_j)` times
+        the Doppler factor.
+
+    Returns
+    -------
+    numpy.ndarray
+        :math:`\frac{i}{\pi} \int_{-\infty}^{\infty} \frac{1}{z - t}
+        \exp(-t^2) \text{d}t` for each element of ``scale * z``.
+
+    """
+    z = np.asarray(z, dtype=complex)
+    lower = z.imag <= 0.0
+    on_axis = np.flatnonzero(z.imag == 0.0)
+    lower[on_axis[z.real[on_axis] < 0.0]] = False
+
+    # i conj(z) = -conj(i z) reflects the lower half plane, i.e. the real
+    # part of i z changes sign.
+    iz = z * (1j * scale)
+    np.negative(iz.real, out=iz.real, where=lower)
+    d = _WEIDEMAN_L - iz
+    np.reciprocal(d, out=d)
+    Z = iz
+    Z += _WEIDEMAN_L
+    Z *= d
+
+    p = np.full(z.shape, _WEIDEMAN_A[0], dtype=complex)
+    for a in _WEIDEMAN_A[1:]:
+        p *= Z
+        p += a
+    p *= d
+    p *= 2.0
+    p += _INV_SQRT_PI
+    p *= d
+    np.negative(p.real, out=p.real, where=lower)
+    return p
+
+
+_broaden_wmp_polynomials_kernel = _jit(_broaden_wmp_polynomials)
+
+
+@_jit
+def evaluate_kernel(E, T, E_min, E_max, sqrtE_min, spacing, sqrtAWR, poles,
+                     residues, window_start, window_end, broaden_poly,
+                     curvefit):
+    """Compute scattering, absorption, and fission cross sections at one
+    energy from the plain arrays of a nuclide.
+
+    This is compiled with numba if it is installed, so that it can be called
+    from other compiled code.  See :meth:`WindowedMultipole.evaluate_point`.
+
+    Parameters
+    ----------
+    E : float
+        Energy of the incident neutron in eV.
+    T : float
+        Temperature of the target in K.
+    E_min, E_max, sqrtE_min, spacing, sqrtAWR, poles, residues, window_start,
+    window_end, broaden_poly, curvefit
+        The nuclide data from :meth:`WindowedMultipole.kernel_args`.
+
+    Returns
+    -------
+    3-tuple of float
+        Total, absorption, and fission microscopic cross sections at the
+        given energy and temperature.
+
+    """
+    sig = np.zeros(3)
+    if E < E_min or E > E_max:
+        return sig[0], sig[1], sig[2]
+
+    sqrtkT = sqrt(K_BOLTZMANN * T)
+    sqrtE = sqrt(E)
+    invE = 1.0 / E
+    i_window = min(int((sqrtE - sqrtE_min) / spacing), curvefit.shape[0] - 1)
+
+    # Curvefit polynomial.
+    n_poly = curvefit.shape[1]
+    if sqrtkT != 0.0 and broaden_poly[i_window]:
+        polynomials = _broaden_wmp_polynomials_kernel(E, sqrtAWR / sqrtkT,
+                                                      n_poly)
+    else:
+        polynomials = np.empty(n_poly)
+        temp = invE
+        for i_poly in range(n_poly):
+            polynomials[i_poly] = temp
+            temp *= sqrtE
+    for i_poly in range(n_poly):
+        for i_xs in range(curvefit.shape[2]):
+            sig[i_xs] += polynomials[i_poly] * curvefit[i_window, i_poly, i_xs]
+
+    # Poles of this window.
+    dopp = 0.0
+    factor = 0.0
+    if sqrtkT != 0.0:
+        dopp = sqrtAWR / sqrtkT
+        factor = dopp * invE * sqrt(pi)
+    for i_pole in range(window_start[i_window], window_end[i_window]):
+        if sqrtkT == 0.0:
+            c_temp = 1j / (sqrtE - poles[i_pole]) * invE
+        else:
+            c_temp = (_faddeeva_kernel((sqrtE - poles[i_pole]) * dopp)
+                      * factor)
+        for i_xs in range(residues.shape[0]):
+            sig[i_xs] += (residues[i_xs, i_pole] * c_temp).real
+
+    return sig[0], sig[1], sig[2]
+
+
+def _lap(stats, phase, t0):
+    """Add the time since `t0` to a phase of an instrumentation stats dict and
+    return the current time."""
+    t = time.perf_counter()
+    stats['time'][phase] += t - t0
+    return t
+
+
+def _count_half_planes(stats, z):
+    """Count Faddeeva arguments by half plane in an instrumentation stats dict.
+    Arguments on the negative real axis are evaluated like the upper half
+    plane, see :func:`_faddeeva_array`."""
+    n_upper = int(np.count_nonzero(np.angle(z) > 0))
+    stats['faddeeva_upper'] += n_upper
+    stats['faddeeva_lower'] += int(np.size(z)) - n_upper
+
+
+def _read_dataset(dataset, mmap=False):
+    """Read an HDF5 dataset, memory-mapping it if requested and possible.
+
+    Parameters
+    ----------
+    dataset : h5py.Dataset
+        Dataset to read.
+    mmap : bool
+        Whether to memory-map the dataset.  Only contiguous, uncompressed,
+        non-empty datasets can be memory-mapped; others are read into memory.
+
+    Returns
+    -------
+    numpy.ndarray
+        Contents of the dataset.  Memory-mapped arrays are read-only.
+
+    """
+    if mmap and dataset.size and dataset.chunks is None:
+        offset = dataset.id.get_offset()
+        if offset is not None:
+            return np.memmap(dataset.file.filename, dtype=dataset.dtype,
+                             mode='r', offset=offset, shape=dataset.shape)
+    return dataset[()]
+
+
 class WindowedMultipole(object):
     """Resonant cross sections represented in the windowed multipole format.
 
     Parameters
     ----------
+    name : str
+        Name of the nuclide using the GND naming convention
+    faddeeva_mode : {'exact', 'fast'}
+        How the Faddeeva function is evaluated at finite temperature.  'exact'
+        is accurate to round-off: :meth:`_evaluate` uses
+        :func:`scipy.special.wofz` for every pole, and the array evaluators
+        use Weideman's rational approximation, see
+        :func:`_faddeeva_rational_array`.  'fast' uses Gauss-Hermite rational
+        approximations for pole arguments far from the origin, see
+        :func:`_faddeeva_fast_array`.
 
     Attributes
     ----------
+    name : str
+        Name of the nuclide using the GND naming convention
+    faddeeva_mode : {'exact', 'fast'}
+        How the Faddeeva function is evaluated at finite temperature.
     fit_order : Integral
         Order of the windowed curvefit.
     fissionable : bool
         Whether or not the target nuclide has fission data.
+    dtype : {'float64', 'float32'}
+        Precision the pole data and curvefit are stored in.
+    nbytes : Integral
+        Number of bytes held by the pole, window and curvefit arrays,
+        including the layout built by :meth:`compile`.
+    stats : dict or None
+        Instrumentation counters while collection is enabled, see
+        :meth:`start_stats`.
     spacing : Real
         The width of each window in sqrt(E)-space.  For example, the frst window
         will end at (sqrt(E_min) + spacing)**2 and the second window at
@@ -242,8 +786,9 @@ class WindowedMultipole(object):
         a/E + b/sqrt(E) + c + d sqrt(E) + ...
 
     """
-    def __init__(self, name):
+    def __init__(self, name, faddeeva_mode='exact'):
         self.name = name
+        self.faddeeva_mode = faddeeva_mode
         self.spacing = None
         self.sqrtAWR = None
         self.E_min = None
@@ -252,11 +797,16 @@ class WindowedMultipole(object):
         self.windows = None
         self.broaden_poly = None
         self.curvefit = None
+        self._stats = None
 
     @property
     def name(self):
         return self._name
 
+    @property
+    def faddeeva_mode(self):
+        return self._faddeeva_mode
+
     @property
     def fit_order(self):
         return self.curvefit.shape[1] - 1
@@ -265,6 +815,22 @@ class WindowedMultipole(object):
     def fissionable(self):
         return self.data.shape[1] == 4
 
+    @property
+    def dtype(self):
+        return 'float32' if self.data.dtype == np.complex64 else 'float64'
+
+    @property
+    def nbytes(self):
+        arrays = [self.data, self.windows, self.broaden_poly, self.curvefit]
+        if self._layout is not None:
+            arrays.extend(a for a in self._layout.values()
+                          if isinstance(a, np.ndarray))
+        return sum(a.nbytes for a in arrays if a is not None)
+
+    @property
+    def stats(self):
+        return self._stats
+
     @property
     def spacing(self):
         return self._spacing
@@ -302,12 +868,18 @@ class WindowedMultipole(object):
         check_type('name', name, str)
         self._name = name
 
+    @faddeeva_mode.setter
+    def faddeeva_mode(self, faddeeva_mode):
+        check_value('faddeeva_mode', faddeeva_mode, _FADDEEVA_MODES)
+        self._faddeeva_mode = faddeeva_mode
+
     @spacing.setter
     def spacing(self, spacing):
         if spacing is not None:
             check_type('spacing', spacing, Real)
             check_greater_than('spacing', spacing, 0.0, equality=False)
         self._spacing = spacing
+        self._kernel_args = None
 
     @sqrtAWR.setter
     def sqrtAWR(self, sqrtAWR):
@@ -315,6 +887,7 @@ class WindowedMultipole(object):
             check_type('sqrtAWR', sqrtAWR, Real)
             check_greater_than('sqrtAWR', sqrtAWR, 0.0, equality=False)
         self._sqrtAWR = sqrtAWR
+        self._kernel_args = None
 
     @E_min.setter
     def E_min(self, E_min):
@@ -322,6 +895,8 @@ class WindowedMultipole(object):
             check_type('E_min', E_min, Real)
             check_greater_than('E_min', E_min, 0.0, equality=True)
         self._E_min = E_min
+        self._layout = None
+        self._kernel_args = None
 
     @E_max.setter
     def E_max(self, E_max):
@@ -329,6 +904,7 @@ class WindowedMultipole(object):
             check_type('E_max', E_max, Real)
             check_greater_than('E_max', E_max, 0.0, equality=False)
         self._E_max = E_max
+        self._kernel_args = None
 
     @data.setter
     def data(self, data):
@@ -344,6 +920,8 @@ class WindowedMultipole(object):
             if not np.issubdtype(data.dtype, np.complexfloating):
                 raise TypeError('Multipole data arrays must be complex dtype')
         self._data = data
+        self._layout = None
+        self._kernel_args = None
 
     @windows.setter
     def windows(self, windows):
@@ -355,6 +933,8 @@ class WindowedMultipole(object):
                 raise TypeError('Multipole windows arrays must be integer'
                                 ' dtype')
         self._windows = windows
+        self._layout = None
+        self._kernel_args = None
 
     @broaden_poly.setter
     def broaden_poly(self, broaden_poly):
@@ -366,6 +946,7 @@ class WindowedMultipole(object):
                 raise TypeError('Multipole broaden_poly arrays must be boolean'
                                 ' dtype')
         self._broaden_poly = broaden_poly
+        self._kernel_args = None
 
     @curvefit.setter
     def curvefit(self, curvefit):
@@ -379,9 +960,12 @@ class WindowedMultipole(object):
             if not np.issubdtype(curvefit.dtype, np.floating):
                 raise TypeError('Multipole curvefit arrays must be float dtype')
         self._curvefit = curvefit
+        self._layout = None
+        self._kernel_args = None
 
     @classmethod
-    def from_hdf5(cls, group_or_filename):
+    def from_hdf5(cls, group_or_filename, faddeeva_mode='exact', mmap=False,
+                  dtype='float64'):
         """Construct a WindowedMultipole object from an HDF5 group or file.
 
         Parameters
@@ -389,7 +973,20 @@ class WindowedMultipole(object):
         group_or_filename : h5py.Group or str
             HDF5 group containing multipole data. If given as a string, it is
             assumed to be the filename for the HDF5 file, and the first group is
-            used to read from.
+            used to read from.  The file is closed before returning.
+        faddeeva_mode : {'exact', 'fast'}
+            How the Faddeeva function is evaluated at finite temperature.
+        mmap : bool
+            Whether to memory-map the array datasets instead of reading them
+            into memory.  Datasets that are chunked, compressed or empty are
+            always read.  The layout built by :meth:`compile` on the first
+            evaluation is held in memory either way.
+        dtype : {'float64', 'float32'}
+            Precision to store the pole data and curvefit in.  Single
+            precision is checked against double precision with
+            :meth:`astype`, and the nuclide is kept in double precision with a
+            warning if it exceeds the 0.1% target error.  Single precision
+            arrays are always read into memory.
 
         Returns
         -------
@@ -402,47 +999,48 @@ class WindowedMultipole(object):
         if isinstance(group_or_filename, h5py.Group):
             group = group_or_filename
         else:
-            h5file = h5py.File(group_or_filename, 'r')
-
-            # Make sure version matches
-            if 'version' in h5file.attrs:
-                major, minor = h5file.attrs['version']
-                if major != WMP_VERSION_MAJOR:
+            with h5py.File(group_or_filename, 'r') as h5file:
+                # Make sure version matches
+                if 'version' in h5file.attrs:
+                    major, minor = h5file.attrs['version']
+                    if major != WMP_VERSION_MAJOR:
+                        raise IOError(
+                            'WMP data format uses version {}. {} whereas your '
+                            'installation of the OpenMC Python API expects '
+                            'version {}.x.'.format(major, minor,
+                                                   WMP_VERSION_MAJOR))
+                else:
                     raise IOError(
-                        'WMP data format uses version {}. {} whereas your '
+                        'WMP data does not indicate a version. Your '
                         'installation of the OpenMC Python API expects version '
-                        '{}.x.'.format(major, minor, WMP_VERSION_MAJOR))
-            else:
-                raise IOError(
-                    'WMP data does not indicate a version. Your installation of '
-                    'the OpenMC Python API expects version {}.x data.'
-                    .format(WMP_VERSION_MAJOR))
+                        '{}.x data.'.format(WMP_VERSION_MAJOR))
 
-            group = list(h5file.values())[0]
+                group = list(h5file.values())[0]
+                return cls.from_hdf5(group, faddeeva_mode, mmap, dtype)
 
         name = group.name[1:]
-        out = cls(name)
+        out = cls(name, faddeeva_mode)
 
         # Read scalars.
 
-        out.spacing = group['spacing'].value
-        out.sqrtAWR = group['sqrtAWR'].value
-        out.E_min = group['E_min'].value
-        out.E_max = group['E_max'].value
+        out.spacing = group['spacing'][()]
+        out.sqrtAWR = group['sqrtAWR'][()]
+        out.E_min = group['E_min'][()]
+        out.E_max = group['E_max'][()]
 
         # Read arrays.
 
         err = "WMP '{}' array shape is not consistent with the '{}' array shape"
 
-        out.data = group['data'].value
+        out.data = _read_dataset(group['data'], mmap)
 
-        out.windows = group['windows'].value
+        out.windows = _read_dataset(group['windows'], mmap)
 
-        out.broaden_poly = group['broaden_poly'].value.astype(np.bool)
+        out.broaden_poly = group['broaden_poly'][()].astype(np.bool_)
         if out.broaden_poly.shape[0] != out.windows.shape[0]:
             raise ValueError(err.format('broaden_poly', 'windows'))
 
-        out.curvefit = group['curvefit'].value
+        out.curvefit = _read_dataset(group['curvefit'], mmap)
         if out.curvefit.shape[0] != out.windows.shape[0]:
             raise ValueError(err.format('curvefit', 'windows'))
 
@@ -451,8 +1049,190 @@ class WindowedMultipole(object):
             raise ValueError("Windowed multipole is only supported for "
                              "curvefits with 3 or more terms.")
 
+        check_value('dtype', dtype, _DTYPES)
+        if dtype != 'float64':
+            out = out.astype(dtype)
+
         return out
 
+    def astype(self, dtype, rtol=1e-3, atol=1e-5, on_error='warn'):
+        """Copy the nuclide with the pole data and curvefit in a given
+        precision.
+
+        Only the stored arrays change precision, the evaluators still compute
+        in double precision.  A single precision copy is compared with this
+        nuclide on a log-spaced energy grid plus the resonance energies at 0,
+        300 and 3000 K.  Differences below `atol` are ignored, as in the
+        validation script.
+
+        Parameters
+        ----------
+        dtype : {'float64', 'float32'}
+            Precision to store the pole data and curvefit in.
+        rtol : Real
+            Largest relative error of any cross section accepted for single
+            precision.  Defaults to the 0.1% target error of the library.
+        atol : Real
+            Absolute differences in barns below which cross sections are not
+            compared.
+        on_error : {'warn', 'raise'}
+            Whether to warn and return this nuclide unchanged, or to raise a
+            ValueError, when the error exceeds `rtol`.
+
+        Returns
+        -------
+        WindowedMultipole
+            The nuclide in the given precision.
+
+        """
+        check_value('dtype', dtype, _DTYPES)
+        check_value('on_error', on_error, ('warn', 'raise'))
+        complex_dtype = np.complex64 if dtype == 'float32' else np.complex128
+
+        out = WindowedMultipole(self.name, self.faddeeva_mode)
+        out.spacing = self.spacing
+        out.sqrtAWR = self.sqrtAWR
+        out.E_min = self.E_min
+        out.E_max = self.E_max
+        out.data = self.data.astype(complex_dtype)
+        out.windows = self.windows
+        out.broaden_poly = self.broaden_poly
+        out.curvefit = self.curvefit.astype(dtype)
+        if dtype == 'float64' or self.dtype == 'float32':
+            return out
+
+        energy = np.logspace(np.log10(self.E_min), np.log10(self.E_max), 1000)
+        poles = self.data[:, _MP_EA].real
+        energy = np.concatenate((energy, poles[poles > 0.]**2))
+        energy = np.unique(np.clip(energy, self.E_min, self.E_max))
+        temperatures = (0., 300., 3000.)
+        sig = self.evaluate_multi(energy, temperatures)
+        error = np.abs(out.evaluate_multi(energy, temperatures) - sig)
+        relerr = np.where(error > atol, error / np.maximum(np.abs(sig), atol),
+                          0.)
+        max_error = relerr.max()
+        if max_error > rtol:
+            msg = ('Single precision {} has a relative error of {:.2e}, more '
+                   'than {:.2e}'.format(self.name, max_error, rtol))
+            if on_error == 'raise':
+                raise ValueError(msg)
+            warnings.warn(msg + ', keeping double precision')
+            return self
+        return out
+
+    def compile(self):
+        """Build the contiguous pole layout used by the evaluators.
+
+        The poles and each channel's residues are copied out of :attr:`data`
+        into separate contiguous arrays, and the 1-based window bounds are
+        converted to 0-based [start, end) offsets.  The curvefit is
+        transposed so that each coefficient of each channel is contiguous over
+        the windows.  The layout is built on first evaluation if this is not
+        called explicitly, and is rebuilt after :attr:`data`, :attr:`windows`,
+        :attr:`curvefit` or :attr:`E_min` change.
+
+        Returns
+        -------
+        dict
+            'poles' (n_poles,), 'residues' (n_residues, n_poles),
+            'window_start', 'window_end' and 'window_size' (n_windows,),
+            'curvefit' (fit_order + 1, n_channels, n_windows) and 'sqrtE_min'.
+
+        """
+        if self._layout is None:
+            window_start = self.windows[:, 0].astype(np.intp) - 1
+            window_end = np.maximum(self.windows[:, 1], window_start)
+            # Poles stay in double precision even for single precision data,
+            # since sqrt(E) - p cancels near resonances.
+            self._layout = {
+                'poles': np.ascontiguousarray(self.data[:, _MP_EA],
+                                              dtype=complex),
+                'residues': np.ascontiguousarray(self.data[:, _MP_RS:].T),
+                'window_start': window_start,
+                'window_end': window_end.astype(np.intp),
+                'window_size': (window_end - window_start).astype(np.intp),
+                'curvefit': np.ascontiguousarray(
+                    self.curvefit.transpose(1, 2, 0)),
+                'sqrtE_min': sqrt(self.E_min),
+            }
+        return self._layout
+
+    def start_stats(self):
+        """Start collecting instrumentation counters for all evaluations.
+
+        Collection costs one attribute check per evaluation when it is off.
+        Starting again resets the counters.
+
+        Returns
+        -------
+        dict
+            The counters, updated in place by every following evaluation:
+            'evaluations' and 'out_of_range' count energies evaluated and
+            those outside [E_min, E_max].  'window_evaluations' (n_windows,)
+            counts evaluations per window and 'poles_visited' the poles
+            evaluated in total.  'poles_histogram'[k] counts evaluations that
+            visited k poles.  'faddeeva_upper' and 'faddeeva_lower' count
+            Faddeeva function arguments per half plane.  'time' holds the
+            cumulative seconds spent in the 'window_lookup', 'curvefit',
+            'faddeeva' and 'poles' phases.
+
+        """
+        layout = self.compile()
+        n_poles = layout['window_end'] - layout['window_start']
+        max_poles = n_poles.max() if n_poles.size else 0
+        self._stats = {
+            'evaluations': 0,
+            'out_of_range': 0,
+            'window_evaluations': np.zeros(self.windows.shape[0], dtype=int),
+            'poles_visited': 0,
+            'poles_histogram': np.zeros(max_poles + 1, dtype=int),
+            'faddeeva_upper': 0,
+            'faddeeva_lower': 0,
+            'time': {'window_lookup': 0., 'curvefit': 0., 'faddeeva': 0.,
+                     'poles': 0.},
+        }
+        return self._stats
+
+    def stop_stats(self):
+        """Stop collecting instrumentation counters.
+
+        Returns
+        -------
+        dict or None
+            The counters collected since :meth:`start_stats`.
+
+        """
+        stats = self._stats
+        self._stats = None
+        return stats
+
+    @contextmanager
+    def collect_stats(self):
+        """Context manager collecting instrumentation counters for the
+        evaluations in its block, see :meth:`start_stats`.
+
+        Yields
+        ------
+        dict
+            The counters, complete once the block exits.
+
+        """
+        previous = self._stats
+        try:
+            yield self.start_stats()
+        finally:
+            self._stats = previous
+
+    def _count_windows(self, stats, i_window):
+        """Add the windows and poles of evaluated energies to the stats."""
+        layout = self.compile()
+        n_poles = (layout['window_end'] - layout['window_start'])[i_window]
+        hist = stats['poles_histogram']
+        stats['window_evaluations'] += np.bincount(
+            i_window, minlength=stats['window_evaluations'].shape[0])
+        stats['poles_visited'] += int(n_poles.sum())
+        hist += np.bincount(n_poles, minlength=hist.shape[0])
+
     def _evaluate(self, E, T):
         """Compute scattering, absorption, and fission cross sections.
 
@@ -471,6 +1251,13 @@ class WindowedMultipole(object):
 
         """
 
+        stats = self._stats
+        if stats is not None:
+            t0 = time.perf_counter()
+            stats['evaluations'] += 1
+            if E < self.E_min or E > self.E_max:
+                stats['out_of_range'] += 1
+
         if E < self.E_min: return (0, 0, 0)
         if E > self.E_max: return (0, 0, 0)
 
@@ -483,17 +1270,21 @@ class WindowedMultipole(object):
         invE = 1.0 / E
 
         # Locate us.  The i_window calc omits a + 1 present in F90 because of
-        # the 1-based vs. 0-based indexing.  Similarly startw needs to be
-        # decreased by 1.  endw does not need to be decreased because
-        # range(startw, endw) does not include endw.
-        i_window = int(np.floor((sqrtE - sqrt(self.E_min)) / self.spacing))
-        startw = self.windows[i_window, 0] - 1
-        endw = self.windows[i_window, 1]
+        # the 1-based vs. 0-based indexing.  The window bounds in the compiled
+        # layout are already 0-based.
+        layout = self.compile()
+        i_window = int((sqrtE - layout['sqrtE_min']) / self.spacing)
+        i_window = min(i_window, self.windows.shape[0] - 1)
+        startw = layout['window_start'][i_window]
+        endw = layout['window_end'][i_window]
+        if stats is not None:
+            stats['window_evaluations'][i_window] += 1
+            stats['poles_visited'] += int(endw - startw)
+            stats['poles_histogram'][endw - startw] += 1
+            t0 = _lap(stats, 'window_lookup', t0)
 
         # Initialize the ouptut cross sections.
-        sig_s = 0.0
-        sig_a = 0.0
-        sig_f = 0.0
+        sig = np.zeros(3)
 
         # ======================================================================
         # Add the contribution from the curvefit polynomial.
@@ -501,104 +1292,2166 @@ class WindowedMultipole(object):
         if sqrtkT != 0 and self.broaden_poly[i_window]:
             # Broaden the curvefit.
             dopp = self.sqrtAWR / sqrtkT
-            broadened_polynomials = _broaden_wmp_polynomials(E, dopp,
-                                                             self.fit_order + 1)
-            for i_poly in range(self.fit_order+1):
-                sig_s += (self.curvefit[i_window, i_poly, _FIT_S]
-                          * broadened_polynomials[i_poly])
-                sig_a += (self.curvefit[i_window, i_poly, _FIT_A]
-                          * broadened_polynomials[i_poly])
-                if self.fissionable:
-                    sig_f += (self.curvefit[i_window, i_poly, _FIT_F]
-                              * broadened_polynomials[i_poly])
+            polynomials = _broaden_wmp_polynomials(E, dopp, self.fit_order + 1)
         else:
+            polynomials = np.empty(self.fit_order + 1)
             temp = invE
             for i_poly in range(self.fit_order+1):
-                sig_s += self.curvefit[i_window, i_poly, _FIT_S] * temp
-                sig_a += self.curvefit[i_window, i_poly, _FIT_A] * temp
-                if self.fissionable:
-                    sig_f += self.curvefit[i_window, i_poly, _FIT_F] * temp
+                polynomials[i_poly] = temp
                 temp *= sqrtE
+        curvefit = self.curvefit[i_window]
+        sig[:curvefit.shape[1]] = polynomials.dot(curvefit)
+        if stats is not None:
+            t0 = _lap(stats, 'curvefit', t0)
 
         # ======================================================================
         # Add the contribution from the poles in this window.
 
-        if sqrtkT == 0.0:
-            # If at 0K, use asymptotic form.
-            for i_pole in range(startw, endw):
-                psi_chi = -1j / (self.data[i_pole, _MP_EA] - sqrtE)
-                c_temp = psi_chi / E
-                sig_s += (self.data[i_pole, _MP_RS] * c_temp).real
-                sig_a += (self.data[i_pole, _MP_RA] * c_temp).real
-                if self.fissionable:
-                    sig_f += (self.data[i_pole, _MP_RF] * c_temp).real
+        if endw > startw:
+            poles = layout['poles'][startw:endw]
+            residues = layout['residues'][:, startw:endw]
 
-        else:
-            # At temperature, use Faddeeva function-based form.
-            dopp = self.sqrtAWR / sqrtkT
-            for i_pole in range(startw, endw):
-                Z = (sqrtE - self.data[i_pole, _MP_EA]) * dopp
-                w_val = _faddeeva(Z) * dopp * invE * sqrt(pi)
-                sig_s += (self.data[i_pole, _MP_RS] * w_val).real
-                sig_a += (self.data[i_pole, _MP_RA] * w_val).real
-                if self.fissionable:
-                    sig_f += (self.data[i_pole, _MP_RF] * w_val).real
+            if sqrtkT == 0.0:
+                # If at 0K, use asymptotic form.
+                c_temp = 1j / (sqrtE - poles) * invE
+            else:
+                # At temperature, use Faddeeva function-based form.
+                dopp = self.sqrtAWR / sqrtkT
+                Z = (sqrtE - poles) * dopp
+                if self.faddeeva_mode == 'fast':
+                    w_val = _faddeeva_fast_array(Z)
+                else:
+                    w_val = _faddeeva_array(Z)
+                c_temp = w_val * (dopp * invE * sqrt(pi))
+                if stats is not None:
+                    _count_half_planes(stats, Z)
+                    t0 = _lap(stats, 'faddeeva', t0)
+
+            sig[:residues.shape[0]] += residues.dot(c_temp).real
+            if stats is not None:
+                _lap(stats, 'poles', t0)
+
+        return sig[0], sig[1], sig[2]
+
+    def kernel_args(self):
+        """Plain arrays and scalars of this nuclide for the compiled scalar
+        kernel.
+
+        Monte Carlo codes written with numba can call ``WMP.evaluate_kernel(E,
+        T, *nuc.kernel_args())`` from their own compiled loops, avoiding any
+        Python overhead per point.  The tuple is built once and rebuilt after
+        any of the attributes it is made of change.
 
-        return sig_s, sig_a, sig_f
+        Returns
+        -------
+        tuple
+            E_min, E_max, sqrt(E_min), spacing, sqrtAWR, and the poles,
+            residues, window start and end offsets, broaden_poly and curvefit
+            arrays.
 
-    def __call__(self, E, T):
-        """Compute scattering, absorption, and fission cross sections.
+        """
+        if self._kernel_args is None:
+            layout = self.compile()
+            self._kernel_args = (
+                float(self.E_min), float(self.E_max), layout['sqrtE_min'],
+                float(self.spacing), float(self.sqrtAWR), layout['poles'],
+                layout['residues'], layout['window_start'],
+                layout['window_end'], self.broaden_poly,
+                np.ascontiguousarray(self.curvefit))
+        return self._kernel_args
+
+    def evaluate_point(self, E, T):
+        """Compute scattering, absorption, and fission cross sections at one
+        energy with the compiled scalar kernel.
+
+        The kernel is compiled with numba if it is installed, and otherwise
+        this falls back to :meth:`_evaluate`.  It evaluates the Faddeeva
+        function with Weideman's rational approximation, accurate to about
+        2e-14, regardless of :attr:`faddeeva_mode`, and does not update the
+        instrumentation counters.
 
         Parameters
         ----------
-        E : Real or Iterable of Real
+        E : Real
             Energy of the incident neutron in eV.
         T : Real
             Temperature of the target in K.
 
         Returns
         -------
-        3-tuple of Real or 3-tuple of numpy.ndarray
+        3-tuple of Real
             Total, absorption, and fission microscopic cross sections at the
             given energy and temperature.
 
         """
+        if numba is None:
+            return self._evaluate(E, T)
+        return evaluate_kernel(float(E), float(T), *self.kernel_args())
 
-        fun = np.vectorize(lambda x: self._evaluate(x, T))
-        return fun(E)
+    def _window_poles(self, i_window):
+        """Flatten the poles of a sequence of windows into index pairs.
 
-    def export_to_hdf5(self, path, mode='a', libver='earliest'):
-        """Export windowed multipole data to an HDF5 file.
+        Parameters
+        ----------
+        i_window : numpy.ndarray
+            1D array of window indices.
+
+        Returns
+        -------
+        n_poles : numpy.ndarray
+            Number of pairs of every entry of `i_window`.  The pairs of each
+            entry are contiguous, so ``np.repeat(x, n_poles)`` spreads a per
+            entry array `x` over the pairs.
+        i_pole : numpy.ndarray
+            For every pair, the 0-based index of the pole in :attr:`data` and
+            in the compiled layout.
+
+        """
+        layout = self.compile()
+        n_poles = np.take(layout['window_size'], i_window)
+        nonempty = np.flatnonzero(n_poles)
+        if nonempty.size == 0:
+            return n_poles, np.zeros(0, dtype=np.intp)
+
+        # The pole index steps by one within an entry and jumps to the start
+        # of the next entry's window at its first pair.
+        startw = np.take(layout['window_start'], i_window[nonempty])
+        size = n_poles[nonempty]
+        first_pair = np.cumsum(size) - size
+        i_pole = np.ones(first_pair[-1] + size[-1], dtype=np.intp)
+        i_pole[0] = startw[0]
+        i_pole[first_pair[1:]] = startw[1:] - (startw[:-1] + size[:-1] - 1)
+        return n_poles, np.cumsum(i_pole, out=i_pole)
+
+    def _prepare(self, E, sqrtE=None, invE=None):
+        r"""Do the temperature-independent work of evaluating an energy array.
+
+        The window of every energy is located in one pass and the poles of
+        those windows are gathered into flat (energy, pole) pairs.  The
+        unbroadened curvefit contribution and the :math:`\sqrt{E} - p_j`
+        difference of every pair are computed once so that
+        :meth:`_evaluate_prepared` only has to do the temperature-dependent
+        work.
 
         Parameters
         ----------
-        path : str
-            Path to write HDF5 file to
-        mode : {'r', r+', 'w', 'x', 'a'}
-            Mode that is used to open the HDF5 file. This is the second argument
-            to the :class:`h5py.File` constructor.
-        libver : {'earliest', 'latest'}
-            Compatibility mode for the HDF5 file. 'latest' will produce files
-            that are less backwards compatible but have performance benefits.
+        E : numpy.ndarray
+            1D array of energies of the incident neutron in eV.
+        sqrtE : numpy.ndarray, optional
+            Square roots of `E`, if they are already known, e.g. because the
+            same energies are evaluated for many nuclides.
+        invE : numpy.ndarray, optional
+            Inverses of `E`, if they are already known.
+
+        Returns
+        -------
+        dict
+            Temperature-independent arrays consumed by
+            :meth:`_evaluate_prepared`.
 
         """
 
-        # Open file and write version.
-        with h5py.File(path, mode, libver=libver) as f:
-            f.attrs['filetype'] = np.string_('data_wmp')
-            f.attrs['version'] = np.array(WMP_VERSION)
+        stats = self._stats
+        if stats is not None:
+            t0 = time.perf_counter()
+
+        E = np.asarray(E, dtype=float)
+        n_points = E.shape[0]
+        inside = np.flatnonzero((E >= self.E_min) & (E <= self.E_max))
+        E = E[inside]
+        n_E = E.shape[0]
+
+        sqrtE = np.sqrt(E) if sqrtE is None else sqrtE[inside]
+        invE = 1.0 / E if invE is None else invE[inside]
+
+        # Locate all energies at once.  E == E_max may round up to one past the
+        # last window, so clip it back in.
+        layout = self.compile()
+        i_window = (sqrtE - layout['sqrtE_min']) / self.spacing
+        i_window = np.minimum(i_window.astype(int), self.windows.shape[0] - 1)
+
+        # Bucket unsorted energies by window so that each window's poles are
+        # gathered contiguously.  Permuting `inside` along with them scatters
+        # the results back to the original order.
+        # Otherwise, contiguous energies are accumulated into a view of the
+        # output rather than scattered into it.
+        span = None
+        if n_E > 1 and np.any(i_window[1:] < i_window[:-1]):
+            order = np.argsort(i_window, kind='stable')
+            inside = inside[order]
+            E = E[order]
+            sqrtE = sqrtE[order]
+            invE = invE[order]
+            i_window = i_window[order]
+        elif n_E > 0 and inside[-1] - inside[0] + 1 == n_E:
+            span = slice(inside[0], inside[0] + n_E)
+        if stats is not None:
+            t0 = _lap(stats, 'window_lookup', t0)
+
+        # Unbroadened curvefit by Horner's rule in sqrt(E), for all channels
+        # at once.
+        curvefit = layout['curvefit']
+        sig_fit = np.take(curvefit[-1], i_window, axis=1).astype(float)
+        coeffs = np.empty(sig_fit.shape, dtype=curvefit.dtype)
+        for i_poly in range(self.fit_order - 1, -1, -1):
+            sig_fit *= sqrtE
+            np.take(curvefit[i_poly], i_window, axis=1, out=coeffs,
+                    mode='clip')
+            sig_fit += coeffs
+        sig_fit *= invE
+
+        # Only windows flagged in broaden_poly are broadened at temperature.
+        i_broaden = np.flatnonzero(self.broaden_poly[i_window])
+        if stats is not None:
+            t0 = _lap(stats, 'curvefit', t0)
+
+        # Flatten the poles of every energy's window into (energy, pole) pairs.
+        # The pairs of an energy are contiguous, so they are the rows of a
+        # sparse (energy, pole) matrix in CSR format with row offsets
+        # `pair_ptr` and column indices `i_pole`.
+        n_poles, i_pole = self._window_poles(i_window)
+        diff = np.take(layout['poles'], i_pole, mode='clip')
+        np.subtract(np.repeat(sqrtE, n_poles), diff, out=diff)
+        pair_ptr = np.zeros(n_E + 1, dtype=np.intp)
+        np.cumsum(n_poles, out=pair_ptr[1:])
+        if stats is not None:
+            _lap(stats, 'window_lookup', t0)
+
+        return {
+            'n_points': n_points,
+            'inside': inside,
+            'span': span,
+            'E': E,
+            'i_window': i_window,
+            'sig_fit': sig_fit,
+            'i_broaden': i_broaden,
+            'invE': invE,
+            'pair_ptr': pair_ptr,
+            'diff': diff,
+            'i_pole': i_pole,
+        }
+
+    def _evaluate_prepared(self, grid, T, out=None, scale=1.0,
+                           derivative=False):
+        """Compute scattering, absorption, and fission cross sections for an
+        energy array prepared by :meth:`_prepare`.
 
-            g = f.create_group(self.name)
+        Parameters
+        ----------
+        grid : dict
+            Temperature-independent arrays from :meth:`_prepare`.
+        T : Real
+            Temperature of the target in K.
+        out : numpy.ndarray, optional
+            A (3, n_points) array the cross sections are added to instead of
+            being returned in a new array.
+        scale : Real
+            Factor the cross sections are multiplied by, e.g. an atom density.
+        derivative : bool
+            Whether to also return the derivatives of the cross sections with
+            respect to temperature.  `T` must be positive.
 
-            # Write scalars.
-            g.create_dataset('spacing', data=np.array(self.spacing))
-            g.create_dataset('sqrtAWR', data=np.array(self.sqrtAWR))
-            g.create_dataset('E_min', data=np.array(self.E_min))
-            g.create_dataset('E_max', data=np.array(self.E_max))
+        Returns
+        -------
+        numpy.ndarray
+            A (3, n_points) array of the scattering, absorption, and fission
+            microscopic cross sections, or `out`.  Energies outside [E_min,
+            E_max] give zero cross sections.
+        numpy.ndarray
+            Only if `derivative` is set, a (3, n_points) array of their
+            derivatives with respect to temperature in b/K.
 
-            # Write arrays.
-            g.create_dataset('data', data=self.data)
-            g.create_dataset('windows', data=self.windows)
-            g.create_dataset('broaden_poly',
-                             data=self.broaden_poly.astype(np.int8))
-            g.create_dataset('curvefit', data=self.curvefit)
+        """
+
+        sig = np.zeros((3, grid['n_points'])) if out is None else out
+        if derivative:
+            dsig = np.zeros((3, grid['n_points']))
+            # dopp = sqrtAWR/sqrt(kT), so d(dopp)/dT = -dopp/(2T).
+            ddopp_dT = -self.sqrtAWR / sqrt(K_BOLTZMANN * T) / (2.0 * T)
+        inside = grid['inside']
+        stats = self._stats
+        if stats is not None:
+            stats['evaluations'] += grid['n_points']
+            stats['out_of_range'] += grid['n_points'] - inside.shape[0]
+            self._count_windows(stats, grid['i_window'])
+            t0 = time.perf_counter()
+        if inside.size == 0:
+            return (sig, dsig) if derivative else sig
+
+        sqrtkT = sqrt(K_BOLTZMANN * T)
+
+        # ======================================================================
+        # Add the contribution from the curvefit polynomial.
+
+        n_fit = grid['sig_fit'].shape[0]
+        i_broaden = grid['i_broaden']
+        if sqrtkT != 0.0 and i_broaden.size:
+            # Broaden the curvefit.
+            dopp = self.sqrtAWR / sqrtkT
+            broadened_polynomials = _broaden_wmp_polynomials_array(
+                grid['E'][i_broaden], dopp, self.fit_order + 1, derivative)
+            coeffs = np.take(self.compile()['curvefit'],
+                             grid['i_window'][i_broaden], axis=2)
+            if derivative:
+                broadened_polynomials, dpolynomials = broadened_polynomials
+                dsig[:n_fit, inside[i_broaden]] = np.einsum(
+                    'ij,jki->ki', dpolynomials, coeffs) * (ddopp_dT * scale)
+            sig_fit = grid['sig_fit'].copy()
+            sig_fit[:, i_broaden] = np.einsum('ij,jki->ki',
+                                              broadened_polynomials, coeffs)
+        else:
+            sig_fit = grid['sig_fit']
+        if scale != 1.0:
+            sig_fit = sig_fit * scale
+
+        # Accumulate into a view of the output if the energies are one
+        # contiguous run, otherwise into a buffer that is scattered at the end.
+        span = grid['span']
+        if span is not None:
+            acc = sig[:, span]
+        else:
+            acc = np.zeros((sig.shape[0], inside.shape[0]))
+        acc[:n_fit] += sig_fit
+        if stats is not None:
+            t0 = _lap(stats, 'curvefit', t0)
+
+        # ======================================================================
+        # Add the contribution from the poles in each window.
+
+        if grid['diff'].size == 0:
+            if span is None:
+                sig[:, inside] += acc
+            return (sig, dsig) if derivative else sig
+
+        # The factors common to all pairs of an energy are applied after the
+        # pairs are summed.
+        if sqrtkT == 0.0:
+            # If at 0K, use asymptotic form.
+            c_temp = 1j / grid['diff']
+            factor = scale
+        else:
+            # At temperature, use Faddeeva function-based form.
+            dopp = self.sqrtAWR / sqrtkT
+            if derivative:
+                Z = grid['diff'] * dopp
+            if self.faddeeva_mode == 'fast':
+                c_temp = _faddeeva_fast_array(grid['diff'], dopp)
+            else:
+                c_temp = _faddeeva_rational_array(grid['diff'], dopp)
+            factor = dopp * sqrt(pi) * scale
+            if stats is not None:
+                # Scaling by dopp > 0 does not change the half plane.
+                _count_half_planes(stats, grid['diff'])
+                t0 = _lap(stats, 'faddeeva', t0)
+
+        # Multiplying the sparse matrix of pair values by the residues gathers
+        # the residues and sums the pairs of every energy, for all channels in
+        # one pass.
+        residues = self.compile()['residues']
+        n_res = residues.shape[0]
+        shape = (inside.shape[0], residues.shape[1])
+        pairs = sparse.csr_matrix(
+            (c_temp, grid['i_pole'], grid['pair_ptr']), shape=shape)
+        invE = grid['invE']
+        acc[:n_res] += (pairs @ residues.T).real.T * (factor * invE)
+        if span is None:
+            sig[:, inside] += acc
+        if derivative:
+            # w'(z) = -2z w(z) + 2i/sqrt(pi), which also holds for the
+            # integral form used in the lower half plane, so
+            # d(w(Z) dopp)/d(dopp) = w'(Z) Z + w(Z).
+            dc_temp = (-2.0 * Z * c_temp + 2j / sqrt(pi)) * Z + c_temp
+            pairs = sparse.csr_matrix(
+                (dc_temp, grid['i_pole'], grid['pair_ptr']), shape=shape)
+            dsig[:n_res, inside] += (pairs @ residues.T).real.T * (
+                (sqrt(pi) * scale * ddopp_dT) * invE)
+        if stats is not None:
+            _lap(stats, 'poles', t0)
+
+        return (sig, dsig) if derivative else sig
+
+    def _evaluate_array(self, E, T):
+        """Compute scattering, absorption, and fission cross sections for a
+        whole array of energies at once.
+
+        This is the array counterpart of :meth:`_evaluate`, see
+        :meth:`_prepare` and :meth:`_evaluate_prepared`.
+
+        Parameters
+        ----------
+        E : numpy.ndarray
+            1D array of energies of the incident neutron in eV.
+        T : Real
+            Temperature of the target in K.
+
+        Returns
+        -------
+        numpy.ndarray
+            A (3, len(E)) array of the scattering, absorption, and fission
+            microscopic cross sections.  Energies outside [E_min, E_max] give
+            zero cross sections.
+
+        """
+        return self._evaluate_prepared(self._prepare(E), T)
+
+    def __call__(self, E, T):
+        """Compute scattering, absorption, and fission cross sections.
+
+        Parameters
+        ----------
+        E : Real or Iterable of Real
+            Energy of the incident neutron in eV.
+        T : Real
+            Temperature of the target in K.
+
+        Returns
+        -------
+        3-tuple of Real or 3-tuple of numpy.ndarray
+            Total, absorption, and fission microscopic cross sections at the
+            given energy and temperature.
+
+        """
+
+        E = np.asarray(E, dtype=float)
+        sig = self._evaluate_array(E.ravel(), T)
+        return tuple(sig[i].reshape(E.shape) for i in range(3))
+
+    def _chunk_size(self, chunk_size):
+        """Number of energies per chunk, by default as many as keep the
+        (energy, pole) pairs of a chunk within _CHUNK_PAIRS."""
+        if chunk_size is None:
+            layout = self.compile()
+            n_poles = layout['window_end'] - layout['window_start']
+            max_poles = n_poles.max() if n_poles.size else 0
+            return max(1, _CHUNK_PAIRS // max(1, max_poles))
+        check_type('chunk_size', chunk_size, Integral)
+        check_greater_than('chunk_size', chunk_size, 0)
+        return chunk_size
+
+    def iter_chunks(self, E, T, chunk_size=None):
+        """Compute scattering, absorption, and fission cross sections one
+        chunk of energies at a time.
+
+        Only one chunk's temporaries are held at a time, so the memory used
+        does not grow with the number of energies.
+
+        Parameters
+        ----------
+        E : numpy.ndarray
+            Energies of the incident neutron in eV, flattened in C order.  May
+            be an ``np.memmap``, only one chunk of it is read at a time.
+        T : Real
+            Temperature of the target in K.
+        chunk_size : Integral, optional
+            Number of energies per chunk.  By default it is chosen from the
+            largest number of poles per window so that the memory used per
+            chunk is bounded.
+
+        Yields
+        ------
+        slice
+            Positions of the chunk in the flattened energies.
+        numpy.ndarray
+            A (3, chunk length) array of the scattering, absorption, and
+            fission microscopic cross sections.
+
+        """
+        E = E.reshape(-1) if isinstance(E, np.ndarray) else np.ravel(E)
+        chunk_size = self._chunk_size(chunk_size)
+        for start in range(0, E.shape[0], chunk_size):
+            chunk = slice(start, min(start + chunk_size, E.shape[0]))
+            yield chunk, self._evaluate_array(E[chunk], T)
+
+    def evaluate_chunked(self, E, T, out=None, chunk_size=None, n_threads=1):
+        """Compute scattering, absorption, and fission cross sections in
+        chunks, writing them into an output array.
+
+        With several threads, the chunks are shared among them and each
+        thread writes its chunks straight into `out`.  Threads only run in
+        parallel inside the NumPy ufuncs, such as the rational approximation
+        of the Faddeeva function in :func:`_faddeeva_rational_array`, and the
+        SciPy sparse matrix product that sums the poles of each energy, which
+        release the GIL.  The Python code between them does not, so small
+        chunks scale worse.  The speedup has not been measured on more than
+        one core, see the ``--threads`` option of ``benchmark.py``.
+        Instrumentation counters (see :meth:`start_stats`) are not thread-safe
+        and may undercount.
+
+        Parameters
+        ----------
+        E : numpy.ndarray
+            Energies of the incident neutron in eV.  May be an ``np.memmap``.
+        T : Real
+            Temperature of the target in K.
+        out : numpy.ndarray, optional
+            A C-contiguous array of shape (3,) + E.shape for the scattering,
+            absorption, and fission cross sections, e.g. an ``np.memmap``.
+            Allocated if not given.
+        chunk_size : Integral, optional
+            Number of energies per chunk, see :meth:`iter_chunks`.  It is
+            reduced if needed so that every thread gets a chunk.
+        n_threads : Integral
+            Number of worker threads.
+
+        Returns
+        -------
+        numpy.ndarray
+            `out`, filled with the microscopic cross sections.
+
+        """
+        E = E if isinstance(E, np.ndarray) else np.asarray(E, dtype=float)
+        if out is None:
+            out = np.empty((3,) + E.shape)
+        elif out.shape != (3,) + E.shape:
+            raise ValueError('Output array must have shape {}'.format(
+                (3,) + E.shape))
+        elif not out.flags.c_contiguous:
+            raise ValueError('Output array must be C-contiguous')
+
+        check_type('n_threads', n_threads, Integral)
+        check_greater_than('n_threads', n_threads, 0)
+
+        E = E.reshape(-1)
+        out_flat = out.reshape(3, -1)
+        n_points = E.shape[0]
+        chunk_size = self._chunk_size(chunk_size)
+        chunk_size = min(chunk_size, max(1, -(-n_points // n_threads)))
+        chunks = [slice(start, min(start + chunk_size, n_points))
+                  for start in range(0, n_points, chunk_size)]
+
+        def evaluate_chunks(chunks):
+            # Each thread reuses its own buffer for all of its chunks.
+            buffer = np.empty((3, chunk_size))
+            for chunk in chunks:
+                sig = buffer[:, :chunk.stop - chunk.start]
+                sig.fill(0.)
+                self._evaluate_prepared(self._prepare(E[chunk]), T, sig)
+                out_flat[:, chunk] = sig
+
+        # Build the layout once rather than in every thread.
+        self.compile()
+        if n_threads == 1:
+            evaluate_chunks(chunks)
+        else:
+            with ThreadPoolExecutor(max_workers=n_threads) as executor:
+                futures = [executor.submit(evaluate_chunks,
+                                           chunks[i::n_threads])
+                           for i in range(n_threads)]
+                for future in futures:
+                    future.result()
+        return out
+
+    def evaluate(self, E, T, derivative=False):
+        """Compute scattering, absorption, and fission cross sections and,
+        optionally, their temperature derivatives.
+
+        The derivatives are analytic and reuse the Faddeeva function values
+        of the cross sections, so they cost a fraction of a finite difference.
+
+        Parameters
+        ----------
+        E : Real or Iterable of Real
+            Energy of the incident neutron in eV.
+        T : Real
+            Temperature of the target in K.  Must be positive if `derivative`
+            is set.
+        derivative : bool
+            Whether to also return the derivatives with respect to `T`.
+
+        Returns
+        -------
+        3-tuple of Real or 3-tuple of numpy.ndarray
+            Total, absorption, and fission microscopic cross sections at the
+            given energy and temperature.
+        3-tuple of Real or 3-tuple of numpy.ndarray
+            Only if `derivative` is set, their derivatives with respect to
+            temperature in b/K.
+
+        """
+
+        if not derivative:
+            return self(E, T)
+        check_greater_than('T', T, 0.)
+
+        E = np.asarray(E, dtype=float)
+        sig, dsig = self._evaluate_prepared(self._prepare(E.ravel()), T,
+                                            derivative=True)
+        return (tuple(sig[i].reshape(E.shape) for i in range(3)),
+                tuple(dsig[i].reshape(E.shape) for i in range(3)))
+
+    def evaluate_multi(self, E, temperatures):
+        """Compute scattering, absorption, and fission cross sections at
+        several temperatures.
+
+        The window search, the gathering of poles and the unbroadened
+        curvefit are done once for the energy grid.  Only the Faddeeva
+        function and the curvefit broadening are evaluated per temperature.
+
+        Parameters
+        ----------
+        E : Real or Iterable of Real
+            Energy of the incident neutron in eV.
+        temperatures : Iterable of Real
+            Temperatures of the target in K.
+
+        Returns
+        -------
+        numpy.ndarray
+            Scattering, absorption, and fission microscopic cross sections with
+            shape (len(temperatures), 3) + numpy.shape(E).
+
+        """
+
+        E = np.asarray(E, dtype=float)
+        temperatures = np.asarray(temperatures, dtype=float).ravel()
+        grid = self._prepare(E.ravel())
+        sig = np.empty((temperatures.shape[0], 3, E.size))
+        for i_T, T in enumerate(temperatures):
+            sig[i_T] = self._evaluate_prepared(grid, T)
+        return sig.reshape((temperatures.shape[0], 3) + E.shape)
+
+    def to_pointwise(self, T, rtol=1e-3, atol=1e-5, max_iterations=50):
+        r"""Generate a pointwise cross section table by adaptive refinement.
+
+        The initial grid holds the window boundaries, :math:`(\sqrt{E_{min}}
+        + k \cdot spacing)^2`, and the pole locations :math:`\text{Re}(p_j)^2`
+        and :math:`(\text{Re}(p_j) \pm \text{Im}(p_j))^2` inside [E_min,
+        E_max].  Every interval is then bisected until linear interpolation
+        reproduces the cross sections at its midpoint and quarter points to
+        within ``rtol * |sigma| + atol`` for all channels.
+
+        Parameters
+        ----------
+        T : Real
+            Temperature of the target in K.
+        rtol : Real
+            Relative tolerance of linear interpolation.  Defaults to the 0.1%
+            target error of the library.
+        atol : Real
+            Absolute tolerance of linear interpolation in barns.
+        max_iterations : Integral
+            Maximum number of bisection passes.  Intervals narrower than
+            1e-10 relative width, e.g. across the small steps of the curvefit
+            at window boundaries, are not refined further.
+
+        Returns
+        -------
+        PointwiseTable
+            The pointwise table, with its construction time and size.
+
+        """
+        check_greater_than('rtol', rtol, 0.0)
+        check_greater_than('atol', atol, 0.0, equality=True)
+        check_type('max_iterations', max_iterations, Integral)
+
+        start_time = time.perf_counter()
+        sqrtE_min = sqrt(self.E_min)
+        sqrtE_max = sqrt(self.E_max)
+
+        # Start from the window boundaries and the poles and their widths.
+        n_windows = self.windows.shape[0]
+        sqrtE = [sqrtE_min + self.spacing * np.arange(n_windows + 1),
+                 [sqrtE_max]]
+        poles = self.data[:, _MP_EA]
+        for sqrtE_pole in (poles.real, poles.real - np.abs(poles.imag),
+                           poles.real + np.abs(poles.imag)):
+            sqrtE.append(sqrtE_pole)
+        sqrtE = np.concatenate(sqrtE)
+        sqrtE = sqrtE[(sqrtE >= sqrtE_min) & (sqrtE <= sqrtE_max)]
+        energy = np.unique(np.clip(sqrtE**2, self.E_min, self.E_max))
+        xs = self._evaluate_array(energy, T)
+
+        # Bisect every interval that is not reproduced.  Only the intervals
+        # next to points inserted in the previous pass are checked.
+        active = np.ones(energy.shape[0] - 1, dtype=bool)
+        for _ in range(max_iterations):
+            i_active = np.flatnonzero(active)
+            if i_active.size == 0:
+                break
+            # Check the interpolation at the quarter points and midpoint.
+            frac = np.array([[0.25], [0.5], [0.75]])
+            E_lo = energy[i_active]
+            E_hi = energy[i_active + 1]
+            E_test = (1.0 - frac) * E_lo + frac * E_hi
+            xs_test = self._evaluate_array(E_test.ravel(), T)
+            xs_test = xs_test.reshape((3,) + E_test.shape)
+            xs_interp = ((1.0 - frac) * xs[:, None, i_active]
+                         + frac * xs[:, None, i_active + 1])
+            error = np.abs(xs_interp - xs_test)
+            refine = np.any(error > rtol * np.abs(xs_test) + atol, axis=(0, 1))
+            refine &= (E_hi - E_lo
+                       > 1e-10 * energy[i_active])
+            if not refine.any():
+                break
+
+            inserted = np.concatenate((np.zeros(energy.shape[0], dtype=bool),
+                                       np.ones(refine.sum(), dtype=bool)))
+            energy = np.concatenate((energy, E_test[1, refine]))
+            xs = np.concatenate((xs, xs_test[:, 1, refine]), axis=1)
+            order = np.argsort(energy, kind='mergesort')
+            energy = energy[order]
+            xs = xs[:, order]
+            inserted = inserted[order]
+            active = inserted[:-1] | inserted[1:]
+
+        return PointwiseTable(self.name, T, energy, xs,
+                              time.perf_counter() - start_time)
+
+    def to_temperature_table(self, T_min, T_max, interpolation='sqrt',
+                             rtol=1e-3, atol=1e-5, max_iterations=10):
+        """Generate pointwise tables at adaptively chosen temperatures.
+
+        The energy grid is that of :meth:`to_pointwise` at `T_min`, where the
+        resonances are sharpest.  Starting from `T_min` and `T_max`, every
+        temperature interval is bisected in the interpolation variable until
+        interpolating between its nodes reproduces the cross sections at its
+        midpoint to within ``rtol * |sigma| + atol`` at every energy.  The
+        error of the table against direct evaluation is then measured at the
+        energy midpoints and temperature quarter points of every interval, as
+        the largest relative error where the absolute error exceeds `atol`.
+        Since the tolerance is only enforced at sampled points, it may exceed
+        `rtol` where the cross sections are close to zero.
+
+        Parameters
+        ----------
+        T_min : Real
+            Lowest temperature of the table in K.
+        T_max : Real
+            Highest temperature of the table in K.
+        interpolation : {'sqrt', 'log'}
+            Whether to interpolate linearly in sqrt(T) or in ln(T).  'log'
+            requires a positive `T_min`.
+        rtol : Real
+            Relative tolerance of the interpolation in energy and
+            temperature.  Defaults to the 0.1% target error of the library.
+        atol : Real
+            Absolute tolerance in barns.
+        max_iterations : Integral
+            Maximum number of bisection passes in temperature.
+
+        Returns
+        -------
+        TemperatureTable
+            The table, with its measured error and construction time.
+
+        """
+        check_value('interpolation', interpolation, _TEMPERATURE_INTERPOLATION)
+        check_greater_than('T_min', T_min, 0.0,
+                           equality=(interpolation == 'sqrt'))
+        check_greater_than('T_max', T_max, T_min)
+        check_greater_than('rtol', rtol, 0.0)
+        check_greater_than('atol', atol, 0.0, equality=True)
+        check_type('max_iterations', max_iterations, Integral)
+
+        start_time = time.perf_counter()
+        to_x, from_x = _TEMPERATURE_INTERPOLATION[interpolation]
+        energy = self.to_pointwise(T_min, rtol, atol).energy
+
+        # Bisect the temperature intervals whose midpoint is not reproduced.
+        temperatures = np.array([T_min, T_max], dtype=float)
+        xs = self.evaluate_multi(energy, temperatures)
+        active = np.ones(1, dtype=bool)
+        for _ in range(max_iterations):
+            i_active = np.flatnonzero(active)
+            if i_active.size == 0:
+                break
+            x = to_x(temperatures)
+            T_mid = from_x(0.5 * (x[i_active] + x[i_active + 1]))
+            xs_mid = self.evaluate_multi(energy, T_mid)
+            xs_interp = 0.5 * (xs[i_active] + xs[i_active + 1])
+            error = np.abs(xs_interp - xs_mid)
+            refine = np.any(error > rtol * np.abs(xs_mid) + atol, axis=(1, 2))
+            if not refine.any():
+                break
+
+            inserted = np.concatenate((np.zeros(temperatures.shape[0],
+                                                dtype=bool),
+                                       np.ones(refine.sum(), dtype=bool)))
+            temperatures = np.concatenate((temperatures, T_mid[refine]))
+            xs = np.concatenate((xs, xs_mid[refine]))
+            order = np.argsort(temperatures)
+            temperatures = temperatures[order]
+            xs = xs[order]
+            inserted = inserted[order]
+            active = inserted[:-1] | inserted[1:]
+
+        table = TemperatureTable(self.name, temperatures, energy, xs,
+                                 interpolation)
+
+        # Measure the error of the table between its nodes, except across the
+        # curvefit steps at window boundaries that to_pointwise leaves.
+        x = to_x(temperatures)
+        frac = np.array([0.25, 0.5, 0.75])
+        T_test = from_x((x[:-1, None] + frac * np.diff(x)[:, None]).ravel())
+        E_test = 0.5 * (energy[1:] + energy[:-1])
+        E_test = E_test[np.diff(energy) > 1e-10 * energy[:-1]]
+        sig = self.evaluate_multi(E_test, T_test)
+        error = np.abs(np.moveaxis(table(E_test, T_test[:, None]), 0, 1) - sig)
+        table.error = np.max(np.where(error > atol,
+                                      error / np.maximum(np.abs(sig), atol),
+                                      0.0))
+        table.build_time = time.perf_counter() - start_time
+        return table
+
+    def collapse(self, group_edges, temperatures, weight_fn=None, order=8):
+        r"""Collapse cross sections to group-averaged cross sections.
+
+        The integrals over each group are done in :math:`\sqrt{E}` space by
+        Gauss-Legendre quadrature of fixed `order` on panels bounded by the
+        window boundaries, the group edges, a sequence doubling in
+        :math:`\sqrt{E}`, and the pole locations :math:`\text{Re}(p_j)` and
+        :math:`\text{Re}(p_j) \pm c \,|\text{Im}(p_j)|` for c in 0.5, 2 and
+        8.  Pole-dense windows thus get proportionally more nodes, placed
+        where the resonances are.  All temperatures are evaluated on the same
+        nodes.
+
+        Parameters
+        ----------
+        group_edges : Iterable of Real
+            Increasing group boundaries in eV.
+        temperatures : Real or Iterable of Real
+            Temperatures of the target in K.
+        weight_fn : callable, optional
+            Weighting spectrum, called with an array of energies in eV.
+            Defaults to 1/E.
+        order : Integral
+            Number of Gauss-Legendre nodes per panel.
+
+        Returns
+        -------
+        numpy.ndarray
+            Group-averaged scattering, absorption, and fission microscopic
+            cross sections with shape (len(temperatures), 3, len(group_edges)
+            - 1).  Only the part of each group inside [E_min, E_max] is
+            averaged over; groups entirely outside it give zero.
+
+        """
+        group_edges = np.asarray(group_edges, dtype=float)
+        if group_edges.ndim != 1 or group_edges.shape[0] < 2:
+            raise ValueError('At least two group edges are required')
+        if np.any(np.diff(group_edges) <= 0.):
+            raise ValueError('Group edges must be strictly increasing')
+        temperatures = np.atleast_1d(np.asarray(temperatures, dtype=float))
+        temperatures = temperatures.ravel()
+        check_type('order', order, Integral)
+        check_greater_than('order', order, 0)
+        if weight_fn is None:
+            weight_fn = np.reciprocal
+
+        n_groups = group_edges.shape[0] - 1
+        sqrtE_min = sqrt(self.E_min)
+        sqrtE_max = sqrt(self.E_max)
+        sqrtE_edges = np.sqrt(np.clip(group_edges, 0., None))
+        lo = max(sqrtE_min, sqrtE_edges[0])
+        hi = min(sqrtE_max, sqrtE_edges[-1])
+        sig = np.zeros((temperatures.shape[0], 3, n_groups))
+        if lo >= hi:
+            return sig
+
+        # Panel boundaries: windows, group edges, poles and their widths, and
+        # a doubling sequence for the 1/E behavior at low energies.
+        n_windows = self.windows.shape[0]
+        poles = self.data[:, _MP_EA]
+        n_doublings = int(np.ceil(np.log2(hi / lo)))
+        breaks = [sqrtE_min + self.spacing * np.arange(n_windows + 1),
+                  sqrtE_edges, poles.real,
+                  np.geomspace(lo, hi, n_doublings + 1)]
+        for c in (0.5, 2., 8.):
+            breaks.append(poles.real - c * np.abs(poles.imag))
+            breaks.append(poles.real + c * np.abs(poles.imag))
+        breaks = np.concatenate(breaks)
+        breaks = np.unique(breaks[(breaks >= lo) & (breaks <= hi)])
+
+        # Gauss-Legendre nodes of every panel, with the dE = 2 sqrtE d(sqrtE)
+        # Jacobian and the weighting spectrum folded into the weights.
+        x, w = np.polynomial.legendre.leggauss(order)
+        half_width = 0.5 * np.diff(breaks)
+        center = 0.5 * (breaks[1:] + breaks[:-1])
+        sqrtE = (center[:, None] + half_width[:, None] * x).ravel()
+        weight = (half_width[:, None] * w).ravel()
+        energy = sqrtE**2
+        weight *= 2. * sqrtE * weight_fn(energy)
+        group = np.searchsorted(group_edges, energy, side='right') - 1
+        group = np.clip(group, 0, n_groups - 1)
+
+        flux = np.bincount(group, weights=weight, minlength=n_groups)
+        chunk_size = self._chunk_size(None)
+        for start in range(0, energy.shape[0], chunk_size):
+            chunk = slice(start, start + chunk_size)
+            sig_chunk = self.evaluate_multi(energy[chunk], temperatures)
+            for i_T in range(temperatures.shape[0]):
+                for i_xs in range(3):
+                    sig[i_T, i_xs] += np.bincount(
+                        group[chunk], weights=sig_chunk[i_T, i_xs]
+                        * weight[chunk], minlength=n_groups)
+
+        nonzero = flux > 0.
+        sig[..., nonzero] /= flux[nonzero]
+        return sig
+
+    def prune_poles(self, T_min=0., T_max=3000., rtol=1e-3, atol=1e-5,
+                    n_samples=16, n_temperatures=4, safety=0.5):
+        r"""Drop the poles of each window that contribute below an error bound
+        in a temperature band.
+
+        Each window is sampled at `n_samples` energies evenly spaced in
+        :math:`\sqrt{E}` and at the resonance energies :math:`\text{Re}(p_j)^2`
+        inside it, at `n_temperatures` temperatures evenly spaced in [T_min,
+        T_max].  Poles are dropped from a window, smallest contribution first,
+        as long as the sum of the dropped contributions stays within `safety`
+        times the error bound ``rtol * |sigma| + atol`` of every channel at
+        every sample.
+
+        The sums can underestimate the error between the samples, so the
+        reduced nuclide is then compared with this one on a 4 times denser
+        energy grid, at the sample temperatures and halfway between them.
+        Windows over `safety` times the bound there drop half as many poles
+        until none is.  This is only guaranteed at these verification points,
+        and the margin left by `safety` covers the error between them.
+
+        The reduced data holds every kept pole once.  Since windows overlap, a
+        window holds all kept poles between its first and last kept one,
+        including poles it would have dropped but a neighboring window keeps,
+        so its pole count can be larger than the number it kept itself.  The
+        curvefit is left unchanged, the dropped contributions are not folded
+        into it.
+
+        Parameters
+        ----------
+        T_min : Real
+            Lowest temperature of the band in K.
+        T_max : Real
+            Highest temperature of the band in K.
+        rtol : Real
+            Relative error bound.  Defaults to the 0.1% target error of the
+            library.
+        atol : Real
+            Absolute error bound in barns.
+        n_samples : Integral
+            Number of evenly spaced sample energies per window.
+        n_temperatures : Integral
+            Number of sample temperatures in the band.
+        safety : Real
+            Fraction of the error bound the dropped poles may use at the
+            sample and verification points, in (0, 1].
+
+        Returns
+        -------
+        WindowedMultipole
+            The nuclide with the reduced pole set.
+        dict
+            Error-bound metadata: 'T_min', 'T_max', 'rtol', 'atol', 'safety',
+            'n_poles' (n_windows,) poles per window before and
+            'n_poles_kept' (n_windows,) after pruning, and 'error_bound'
+            (n_windows,), the largest fraction of the error bound reached by
+            the reduced nuclide in each window at any verification point.
+
+        """
+        check_greater_than('T_min', T_min, 0., equality=True)
+        check_greater_than('T_max', T_max, T_min, equality=True)
+        check_greater_than('rtol', rtol, 0.)
+        check_greater_than('atol', atol, 0., equality=True)
+        check_type('n_samples', n_samples, Integral)
+        check_greater_than('n_samples', n_samples, 0)
+        check_type('n_temperatures', n_temperatures, Integral)
+        check_greater_than('n_temperatures', n_temperatures, 0)
+        check_greater_than('safety', safety, 0.)
+        check_less_than('safety', safety, 1., equality=True)
+
+        layout = self.compile()
+        n_windows = self.windows.shape[0]
+        poles = layout['poles']
+        residues = layout['residues']
+        n_res = residues.shape[0]
+
+        # Sample energies strictly inside the windows, in window order.
+        sqrtE_min = layout['sqrtE_min']
+        sqrtE_max = sqrt(self.E_max)
+        frac = (np.arange(n_samples) + 0.5) / n_samples
+        sqrtE = (sqrtE_min + self.spacing
+                 * (np.arange(n_windows)[:, None] + frac)).ravel()
+        sqrtE = np.concatenate((sqrtE, poles.real))
+        sqrtE = np.unique(sqrtE[(sqrtE > sqrtE_min) & (sqrtE < sqrtE_max)])
+        energy = sqrtE**2
+        i_window = ((sqrtE - sqrtE_min) / self.spacing).astype(int)
+        i_window = np.minimum(i_window, n_windows - 1)
+        n_pairs, i_pole = self._window_poles(i_window)
+        i_entry = np.repeat(np.arange(i_window.shape[0]), n_pairs)
+        diff = sqrtE[i_entry] - poles[i_pole]
+        invE_pair = 1.0 / energy[i_entry]
+
+        # Largest contribution of every (sample, pole) pair relative to the
+        # error bound, over all channels and sample temperatures.
+        ratio = np.zeros(i_entry.shape[0])
+        for T in np.unique(np.linspace(T_min, T_max, n_temperatures)):
+            sqrtkT = sqrt(K_BOLTZMANN * T)
+            if sqrtkT == 0.0:
+                c_temp = 1j / diff * invE_pair
+            else:
+                dopp = self.sqrtAWR / sqrtkT
+                if self.faddeeva_mode == 'fast':
+                    w_val = _faddeeva_fast_array(diff * dopp)
+                else:
+                    w_val = _faddeeva_rational_array(diff * dopp)
+                c_temp = w_val * (dopp * sqrt(pi)) * invE_pair
+            sig = self._evaluate_array(energy, T)
+            bound = rtol * np.abs(sig[:n_res, i_entry]) + atol
+            contrib = np.abs((residues[:, i_pole] * c_temp).real)
+            ratio = np.maximum(ratio, np.max(contrib / bound, axis=0))
+
+        # Pairs are grouped by sample and samples by window, so each window's
+        # ratios form a (samples, poles) block.  Poles are dropped from it,
+        # smallest first, while the sum of their ratios stays within safety.
+        n_poles = layout['window_end'] - layout['window_start']
+        n_window_samples = np.bincount(i_window, minlength=n_windows)
+        pair_end = np.cumsum(n_window_samples * n_poles)
+        orders = []
+        n_drop = np.zeros(n_windows, dtype=int)
+        for i in range(n_windows):
+            if n_poles[i] == 0 or n_window_samples[i] == 0:
+                orders.append(np.arange(n_poles[i]))
+                continue
+            block = ratio[pair_end[i] - n_window_samples[i] * n_poles[i]:
+                          pair_end[i]].reshape(n_window_samples[i], n_poles[i])
+            order = np.argsort(block.max(axis=0), kind='stable')
+            within = np.all(np.cumsum(block[:, order], axis=1) <= safety,
+                            axis=0)
+            n_drop[i] = within.size if within.all() else np.argmin(within)
+            orders.append(order)
+
+        # Verify on a denser grid of energies between the samples above, at
+        # the sample temperatures and halfway between them.
+        frac = (np.arange(4 * n_samples) + 0.5) / (4 * n_samples)
+        sqrtE_check = (sqrtE_min + self.spacing
+                       * (np.arange(n_windows)[:, None] + frac)).ravel()
+        sqrtE_check = sqrtE_check[(sqrtE_check > sqrtE_min)
+                                  & (sqrtE_check < sqrtE_max)]
+        sqrtE_check = np.union1d(sqrtE_check, sqrtE)
+        energy_check = sqrtE_check**2
+        i_window_check = np.minimum(
+            ((sqrtE_check - sqrtE_min) / self.spacing).astype(int),
+            n_windows - 1)
+        T_check = np.unique(np.linspace(T_min, T_max, 2 * n_temperatures - 1))
+        sig_check = [self._evaluate_array(energy_check, T)[:n_res]
+                     for T in T_check]
+
+        while True:
+            # Keep each pole once.  A window holds the run of kept poles from
+            # its first to its last one, which may include poles it dropped
+            # but a neighboring window kept.  That only takes terms out of
+            # its error.
+            kept = np.zeros(poles.shape[0], dtype=bool)
+            first = np.zeros(n_windows, dtype=int)
+            last = np.full(n_windows, -1)
+            for i in range(n_windows):
+                window_kept = layout['window_start'][i] + orders[i][n_drop[i]:]
+                kept[window_kept] = True
+                if window_kept.size:
+                    first[i] = window_kept.min()
+                    last[i] = window_kept.max()
+            i_kept = np.flatnonzero(kept)
+            windows = np.empty((n_windows, 2), dtype=self.windows.dtype)
+            windows[:, 1] = np.searchsorted(i_kept, last, side='right')
+            windows[:, 0] = np.where(last >= 0,
+                                     np.searchsorted(i_kept, first) + 1,
+                                     windows[:, 1] + 1)
+
+            out = WindowedMultipole(self.name, self.faddeeva_mode)
+            out.spacing = self.spacing
+            out.sqrtAWR = self.sqrtAWR
+            out.E_min = self.E_min
+            out.E_max = self.E_max
+            out.data = self.data[i_kept]
+            out.windows = windows
+            out.broaden_poly = self.broaden_poly
+            out.curvefit = self.curvefit
+
+            # Fraction of the error bound used in each window.
+            error_bound = np.zeros(n_windows)
+            for T, sig in zip(T_check, sig_check):
+                error = np.abs(out._evaluate_array(energy_check, T)[:n_res]
+                               - sig) / (rtol * np.abs(sig) + atol)
+                np.maximum.at(error_bound, i_window_check, error.max(axis=0))
+
+            # Windows over the bound between the samples drop fewer poles.
+            over = np.flatnonzero((error_bound > safety) & (n_drop > 0))
+            if over.size == 0:
+                break
+            n_drop[over] //= 2
+
+        n_poles_kept = windows[:, 1] - windows[:, 0] + 1
+        metadata = {'T_min': T_min, 'T_max': T_max, 'rtol': rtol,
+                    'atol': atol, 'safety': safety, 'n_poles': n_poles,
+                    'n_poles_kept': n_poles_kept, 'error_bound': error_bound}
+        return out, metadata
+
+    def check_faddeeva(self, temperatures=(10., 300., 1000., 3000.),
+                       n_samples=8):
+        """Check the 'fast' Faddeeva mode against :func:`scipy.special.wofz`.
+
+        The Faddeeva arguments are sampled over the range they actually take
+        for this nuclide: `n_samples` energies spread over each window, paired
+        with every pole of that window, at each of the given temperatures.  The
+        cross sections at those energies are compared as well.
+
+        Parameters
+        ----------
+        temperatures : Iterable of Real
+            Temperatures of the target in K to check at.
+        n_samples : Integral
+            Number of energies sampled in each window, including its edges.
+
+        Returns
+        -------
+        dict
+            'faddeeva' gives the maximum relative error of the fast Faddeeva
+            function and 'cross_section' the maximum relative error of the
+            nonzero scattering, absorption, and fission cross sections.
+
+        """
+        check_type('n_samples', n_samples, Integral)
+        check_greater_than('n_samples', n_samples, 1, equality=True)
+
+        n_windows = self.windows.shape[0]
+        u = np.linspace(0., 1., n_samples)
+        sqrtE = (sqrt(self.E_min)
+                 + self.spacing * (np.arange(n_windows)[:, None] + u)).ravel()
+        sqrtE = np.minimum(sqrtE, sqrt(self.E_max))
+        i_window = np.repeat(np.arange(n_windows), n_samples)
+        n_pairs, i_pole = self._window_poles(i_window)
+        diff = np.repeat(sqrtE, n_pairs) - self.compile()['poles'][i_pole]
+        E = sqrtE**2
+
+        error = {'faddeeva': 0.0, 'cross_section': 0.0}
+        mode = self.faddeeva_mode
+        try:
+            for T in temperatures:
+                check_greater_than('temperature', T, 0.0)
+                Z = diff * (self.sqrtAWR / sqrt(K_BOLTZMANN * T))
+                w_rel = np.abs(_faddeeva_fast_array(Z) / _faddeeva_array(Z)
+                               - 1.0)
+                w_rel = float(np.max(w_rel, initial=0.0))
+                error['faddeeva'] = max(error['faddeeva'], w_rel)
+
+                self.faddeeva_mode = 'exact'
+                sig_exact = self._evaluate_array(E, T)
+                self.faddeeva_mode = 'fast'
+                sig_fast = self._evaluate_array(E, T)
+                nonzero = sig_exact != 0.0
+                sig_rel = np.abs(sig_fast[nonzero] / sig_exact[nonzero] - 1.0)
+                sig_rel = float(np.max(sig_rel, initial=0.0))
+                error['cross_section'] = max(error['cross_section'], sig_rel)
+        finally:
+            self.faddeeva_mode = mode
+
+        return error
+
+    def digest(self):
+        """Compute a content hash of the nuclide's data.
+
+        Returns
+        -------
+        str
+            Hexadecimal SHA-256 digest of the scalars and of the data,
+            windows, broaden_poly and curvefit arrays.
+
+        """
+        sha = hashlib.sha256()
+        sha.update(repr((self.spacing, self.sqrtAWR, self.E_min,
+                         self.E_max)).encode())
+        for array in (self.data, self.windows, self.broaden_poly,
+                      self.curvefit):
+            sha.update(repr((array.dtype.str, array.shape)).encode())
+            sha.update(np.ascontiguousarray(array).data)
+        return sha.hexdigest()
+
+    def export_to_hdf5(self, path, mode='a', libver='earliest'):
+        """Export windowed multipole data to an HDF5 file.
+
+        Parameters
+        ----------
+        path : str
+            Path to write HDF5 file to
+        mode : {'r', r+', 'w', 'x', 'a'}
+            Mode that is used to open the HDF5 file. This is the second argument
+            to the :class:`h5py.File` constructor.
+        libver : {'earliest', 'latest'}
+            Compatibility mode for the HDF5 file. 'latest' will produce files
+            that are less backwards compatible but have performance benefits.
+
+        """
+
+        # Open file and write version.
+        with h5py.File(path, mode, libver=libver) as f:
+            f.attrs['filetype'] = np.string_('data_wmp')
+            f.attrs['version'] = np.array(WMP_VERSION)
+
+            g = f.create_group(self.name)
+
+            # Write scalars.
+            g.create_dataset('spacing', data=np.array(self.spacing))
+            g.create_dataset('sqrtAWR', data=np.array(self.sqrtAWR))
+            g.create_dataset('E_min', data=np.array(self.E_min))
+            g.create_dataset('E_max', data=np.array(self.E_max))
+
+            # Write arrays.
+            g.create_dataset('data', data=self.data)
+            g.create_dataset('windows', data=self.windows)
+            g.create_dataset('broaden_poly',
+                             data=self.broaden_poly.astype(np.int8))
+            g.create_dataset('curvefit', data=self.curvefit)
+
+
+def check_faddeeva_fast(filenames, temperatures=(10., 300., 1000., 3000.)):
+    """Check the 'fast' Faddeeva mode for a set of library files.
+
+    Parameters
+    ----------
+    filenames : Iterable of str
+        Paths of the windowed multipole HDF5 files to check, e.g. every
+        ``WMP_Library/*.h5`` file.
+    temperatures : Iterable of Real
+        Temperatures of the target in K to check at.
+
+    Returns
+    -------
+    dict
+        The result of :meth:`WindowedMultipole.check_faddeeva` keyed by
+        nuclide name.
+
+    """
+    results = {}
+    for filename in filenames:
+        nuc = WindowedMultipole.from_hdf5(filename)
+        results[nuc.name] = nuc.check_faddeeva(temperatures)
+    return results
+
+
+def _parse_wmp_filename(filename):
+    """Get the nuclide name and ZAID of a library file from its file name.
+
+    Parameters
+    ----------
+    filename : str
+        Base name of a library file, e.g. '092238.h5' or '095242m1.h5'.
+
+    Returns
+    -------
+    name : str
+        Name of the nuclide using the GND naming convention, e.g. 'U238' or
+        'Am242_m1'.  Natural elements have a mass number of 0, e.g. 'C0'.
+    zaid : int
+        1000*Z + A.  Metastable states follow the MCNP convention of adding
+        300 + 100*m to A, e.g. 95642 for Am242_m1.
+
+    """
+    match = _WMP_FILENAME.match(filename)
+    if match is None:
+        raise ValueError('"{}" is not a windowed multipole library file name'
+                         .format(filename))
+    Z, A = int(match.group(1)), int(match.group(2))
+    name = '{}{}'.format(ATOMIC_SYMBOL[Z], A)
+    zaid = 1000*Z + A
+    if match.group(3) is not None:
+        m = int(match.group(3))
+        name += '_m{}'.format(m)
+        zaid += 300 + 100*m
+    return name, zaid
+
+
+def read_wmp_header(group_or_filename, extended=False):
+    """Read the metadata of a windowed multipole library without its arrays.
+
+    Only the scalars and the dataset shapes are read, so this is much cheaper
+    than :meth:`WindowedMultipole.from_hdf5` when scanning a whole library.
+
+    Parameters
+    ----------
+    group_or_filename : h5py.Group or str
+        HDF5 group containing multipole data. If given as a string, it is
+        assumed to be the filename for the HDF5 file, and the first group is
+        used to read from.  The file is closed before returning.
+    extended : bool
+        Whether to also read the (small) windows array to get the number of
+        poles per window.
+
+    Returns
+    -------
+    dict
+        'name', 'spacing', 'sqrtAWR', 'E_min', 'E_max', 'n_poles',
+        'n_residues', 'n_windows', 'fit_order', 'fissionable' and 'nbytes', the
+        memory footprint of the arrays once loaded.  If `extended` is set,
+        also 'mean_poles_per_window' and 'max_poles_per_window'.
+
+    """
+
+    if not isinstance(group_or_filename, h5py.Group):
+        with h5py.File(group_or_filename, 'r') as h5file:
+            group = list(h5file.values())[0]
+            return read_wmp_header(group, extended)
+
+    group = group_or_filename
+    data = group['data']
+    windows = group['windows']
+    curvefit = group['curvefit']
+
+    header = {
+        'name': group.name[1:],
+        'spacing': group['spacing'][()],
+        'sqrtAWR': group['sqrtAWR'][()],
+        'E_min': group['E_min'][()],
+        'E_max': group['E_max'][()],
+        'n_poles': data.shape[0],
+        'n_residues': data.shape[1] - 1,
+        'n_windows': windows.shape[0],
+        'fit_order': curvefit.shape[1] - 1,
+        'fissionable': curvefit.shape[2] == 3,
+        # broaden_poly is stored as int8 and loaded as bool, same size
+        'nbytes': sum(group[key].size * group[key].dtype.itemsize for key in
+                      ('data', 'windows', 'broaden_poly', 'curvefit'))
+    }
+
+    if extended:
+        windows = windows[()]
+        n_poles = np.maximum(windows[:, 1] - windows[:, 0] + 1, 0)
+        header['mean_poles_per_window'] = (n_poles.mean() if n_poles.size
+                                           else 0.)
+        header['max_poles_per_window'] = (int(n_poles.max()) if n_poles.size
+                                          else 0)
+
+    return header
+
+
+def scan_library(filenames, extended=False, max_workers=None):
+    """Read the headers of many library files in parallel processes.
+
+    Parameters
+    ----------
+    filenames : Iterable of str
+        Paths of the windowed multipole HDF5 files to scan, e.g. every
+        ``WMP_Library/*.h5`` file.
+    extended : bool
+        Whether to also get the number of poles per window, see
+        :func:`read_wmp_header`.
+    max_workers : int, optional
+        Number of worker processes.  Defaults to the number of processors.
+
+    Returns
+    -------
+    list of dict
+        The result of :func:`read_wmp_header` for each file, in the order of
+        `filenames`, with the path added as 'filename'.
+
+    """
+    filenames = list(filenames)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        headers = list(executor.map(read_wmp_header, filenames,
+                                    [extended]*len(filenames), chunksize=16))
+    for filename, header in zip(filenames, headers):
+        header['filename'] = filename
+    return headers
+
+
+class WMPLibrary(object):
+    """Windowed multipole library directory with lazily loaded nuclides.
+
+    Nuclides are indexed by name and ZAID from the file names when the library
+    is created, but a nuclide is only read the first time it is accessed.  At
+    most `max_nuclides` nuclides, or `max_bytes` bytes of nuclide data, are
+    kept resident; beyond that the least recently used nuclides are evicted.
+    Files are closed as soon as a nuclide has been read.
+
+    Parameters
+    ----------
+    path : str
+        Directory containing the library files, e.g. WMP_Library.
+    max_nuclides : Integral, optional
+        Maximum number of resident nuclides.  Unlimited by default.
+    max_bytes : Integral, optional
+        Maximum number of bytes of resident nuclide data, including the
+        compiled pole layout, as given by :attr:`WindowedMultipole.nbytes`.
+        Unlimited by default.  The most recently accessed nuclide is always
+        kept, even if it alone exceeds the limit.
+    mmap : bool
+        Whether to memory-map the nuclide arrays, see
+        :meth:`WindowedMultipole.from_hdf5`.
+    faddeeva_mode : {'exact', 'fast'}
+        How the Faddeeva function is evaluated by the loaded nuclides.
+
+    Attributes
+    ----------
+    path : str
+        Directory containing the library files.
+    names : list of str
+        Names of all nuclides in the library, resident or not.
+    resident : list of str
+        Names of the resident nuclides from least to most recently used.
+    nbytes : Integral
+        Number of bytes of resident nuclide data.
+
+    """
+    def __init__(self, path, max_nuclides=None, max_bytes=None, mmap=False,
+                 faddeeva_mode='exact'):
+        if not os.path.isdir(path):
+            raise IOError('WMP library directory "{}" not found'.format(path))
+        if max_nuclides is not None:
+            check_type('max_nuclides', max_nuclides, Integral)
+            check_greater_than('max_nuclides', max_nuclides, 0)
+        if max_bytes is not None:
+            check_type('max_bytes', max_bytes, Integral)
+            check_greater_than('max_bytes', max_bytes, 0)
+        check_value('faddeeva_mode', faddeeva_mode, _FADDEEVA_MODES)
+
+        self.path = path
+        self.max_nuclides = max_nuclides
+        self.max_bytes = max_bytes
+        self.mmap = mmap
+        self.faddeeva_mode = faddeeva_mode
+
+        self._filenames = OrderedDict()
+        self._zaids = {}
+        for filename in sorted(glob.glob(os.path.join(path, '*.h5'))):
+            try:
+                name, zaid = _parse_wmp_filename(os.path.basename(filename))
+            except ValueError:
+                continue
+            self._filenames[name] = filename
+            self._zaids[zaid] = name
+
+        self._resident = OrderedDict()
+        self._nbytes = 0
+
+    def __len__(self):
+        return len(self._filenames)
+
+    def __iter__(self):
+        return iter(self._filenames)
+
+    def __contains__(self, key):
+        try:
+            self._name(key)
+        except KeyError:
+            return False
+        return True
+
+    def __getitem__(self, key):
+        """Get a nuclide by name or ZAID, loading it if it is not resident."""
+        name = self._name(key)
+        if name in self._resident:
+            self._resident.move_to_end(name)
+            return self._resident[name]
+
+        nuc = WindowedMultipole.from_hdf5(self._filenames[name],
+                                          self.faddeeva_mode, self.mmap)
+        nuc.compile()
+        self._resident[name] = nuc
+        self._nbytes += nuc.nbytes
+        self._evict()
+        return nuc
+
+    @property
+    def names(self):
+        return list(self._filenames)
+
+    @property
+    def resident(self):
+        return list(self._resident)
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    def filename(self, key):
+        """Get the path of a nuclide's library file by name or ZAID."""
+        return self._filenames[self._name(key)]
+
+    def evict(self, key):
+        """Drop a nuclide from memory if it is resident."""
+        name = self._name(key)
+        if name in self._resident:
+            self._nbytes -= self._resident.pop(name).nbytes
+
+    def clear(self):
+        """Drop all resident nuclides from memory."""
+        self._resident.clear()
+        self._nbytes = 0
+
+    def _name(self, key):
+        if isinstance(key, Integral):
+            if key not in self._zaids:
+                raise KeyError('No nuclide with ZAID {} in {}'.format(
+                    key, self.path))
+            return self._zaids[key]
+        if key not in self._filenames:
+            raise KeyError('No nuclide named "{}" in {}'.format(
+                key, self.path))
+        return key
+
+    def _evict(self):
+        # Evict least recently used nuclides but always keep the newest one.
+        while len(self._resident) > 1:
+            too_many = (self.max_nuclides is not None
+                        and len(self._resident) > self.max_nuclides)
+            too_big = (self.max_bytes is not None
+                       and self._nbytes > self.max_bytes)
+            if not (too_many or too_big):
+                break
+            name, nuc = self._resident.popitem(last=False)
+            self._nbytes -= nuc.nbytes
+
+
+def export_library_pack(nuclides, path, libver='earliest'):
+    """Export many nuclides to a single HDF5 file of concatenated arrays.
+
+    The `data`, `windows`, `broaden_poly` and `curvefit` arrays of all
+    nuclides are concatenated into one contiguous dataset each, with
+    per-nuclide offsets and scalars stored alongside.  Non-fissionable
+    nuclides are padded with a zero fission residue and curvefits are padded
+    to the highest fit order.  The file can be read back with
+    :func:`load_library_pack`.
+
+    Parameters
+    ----------
+    nuclides : Iterable of WindowedMultipole
+        Nuclides to pack, e.g. ``(library[name] for name in library)`` for a
+        :class:`WMPLibrary`.
+    path : str
+        Path to write HDF5 file to
+    libver : {'earliest', 'latest'}
+        Compatibility mode for the HDF5 file. 'latest' will produce files
+        that are less backwards compatible but have performance benefits.
+
+    """
+    nuclides = list(nuclides)
+    n_poles = np.array([nuc.data.shape[0] for nuc in nuclides])
+    n_windows = np.array([nuc.windows.shape[0] for nuc in nuclides])
+    pole_offset = np.concatenate(([0], np.cumsum(n_poles)))
+    window_offset = np.concatenate(([0], np.cumsum(n_windows)))
+    max_poly = max(nuc.fit_order + 1 for nuc in nuclides)
+
+    data = np.zeros((pole_offset[-1], 4), dtype=complex)
+    windows = np.empty((window_offset[-1], 2), dtype=np.int32)
+    broaden_poly = np.empty(window_offset[-1], dtype=np.int8)
+    curvefit = np.zeros((window_offset[-1], max_poly, 3))
+    for i, nuc in enumerate(nuclides):
+        p0, p1 = pole_offset[i:i+2]
+        w0, w1 = window_offset[i:i+2]
+        data[p0:p1, :nuc.data.shape[1]] = nuc.data
+        windows[w0:w1] = nuc.windows
+        broaden_poly[w0:w1] = nuc.broaden_poly
+        curvefit[w0:w1, :nuc.fit_order+1, :nuc.curvefit.shape[2]] = \
+            nuc.curvefit
+
+    with h5py.File(path, 'w', libver=libver) as f:
+        f.attrs['filetype'] = np.bytes_(b'data_wmp_pack')
+        f.attrs['version'] = np.array(WMP_VERSION)
+
+        # Write the per-nuclide index.
+        f.create_dataset('names', data=np.array(
+            [nuc.name.encode() for nuc in nuclides]))
+        for attr in ('spacing', 'sqrtAWR', 'E_min', 'E_max'):
+            f.create_dataset(attr, data=np.array(
+                [getattr(nuc, attr) for nuc in nuclides], dtype=float))
+        f.create_dataset('fit_order', data=np.array(
+            [nuc.fit_order for nuc in nuclides]))
+        f.create_dataset('fissionable', data=np.array(
+            [nuc.fissionable for nuc in nuclides], dtype=np.int8))
+        f.create_dataset('pole_offset', data=pole_offset)
+        f.create_dataset('window_offset', data=window_offset)
+
+        # Write the concatenated arrays contiguously so they can be mapped.
+        f.create_dataset('data', data=data)
+        f.create_dataset('windows', data=windows)
+        f.create_dataset('broaden_poly', data=broaden_poly)
+        f.create_dataset('curvefit', data=curvefit)
+
+
+def load_library_pack(path, faddeeva_mode='exact'):
+    """Load all nuclides from a file written by :func:`export_library_pack`.
+
+    The file is opened once to read the index, and its concatenated arrays are
+    memory-mapped once.  Every nuclide's arrays are views into that map, so
+    loading copies no nuclide data.  Evaluating a nuclide does, since it builds
+    the contiguous pole layout of :meth:`WindowedMultipole.compile` in memory,
+    about the size of the nuclide's data.
+
+    Parameters
+    ----------
+    path : str
+        Path of the packed library file.
+    faddeeva_mode : {'exact', 'fast'}
+        How the Faddeeva function is evaluated by the loaded nuclides.
+
+    Returns
+    -------
+    collections.OrderedDict
+        WindowedMultipole objects keyed by nuclide name.  Their arrays are
+        read-only.
+
+    """
+    with h5py.File(path, 'r') as f:
+        filetype = f.attrs.get('filetype', b'')
+        if not isinstance(filetype, bytes):
+            filetype = filetype.encode()
+        if filetype != b'data_wmp_pack':
+            raise IOError('"{}" is not a packed WMP library'.format(path))
+        major, minor = f.attrs['version']
+        if major != WMP_VERSION_MAJOR:
+            raise IOError(
+                'WMP data format uses version {}. {} whereas your '
+                'installation of the OpenMC Python API expects version '
+                '{}.x.'.format(major, minor, WMP_VERSION_MAJOR))
+
+        index = {key: f[key][()] for key in (
+            'names', 'spacing', 'sqrtAWR', 'E_min', 'E_max', 'fit_order',
+            'fissionable', 'pole_offset', 'window_offset')}
+        layout = {key: (f[key].id.get_offset(), f[key].dtype, f[key].shape)
+                  for key in ('data', 'windows', 'broaden_poly', 'curvefit')}
+
+    buffer = np.memmap(path, dtype=np.uint8, mode='r')
+    arrays = {}
+    for key, (offset, dtype, shape) in layout.items():
+        if offset is None:
+            # HDF5 allocates no storage for empty datasets.
+            arrays[key] = np.empty(shape, dtype=dtype)
+        else:
+            arrays[key] = np.ndarray(shape, dtype=dtype, buffer=buffer,
+                                     offset=offset)
+    arrays['broaden_poly'] = arrays['broaden_poly'].view(np.bool_)
+
+    nuclides = OrderedDict()
+    for i, name in enumerate(index['names']):
+        p0, p1 = index['pole_offset'][i:i+2]
+        w0, w1 = index['window_offset'][i:i+2]
+        n_res = 3 if index['fissionable'][i] else 2
+        n_poly = index['fit_order'][i] + 1
+
+        nuc = WindowedMultipole(name.decode(), faddeeva_mode)
+        nuc.spacing = float(index['spacing'][i])
+        nuc.sqrtAWR = float(index['sqrtAWR'][i])
+        nuc.E_min = float(index['E_min'][i])
+        nuc.E_max = float(index['E_max'][i])
+        nuc.data = arrays['data'][p0:p1, :n_res+1]
+        nuc.windows = arrays['windows'][w0:w1]
+        nuc.broaden_poly = arrays['broaden_poly'][w0:w1]
+        nuc.curvefit = arrays['curvefit'][w0:w1, :n_poly, :n_res]
+        nuclides[nuc.name] = nuc
+
+    return nuclides
+
+
+class PointwiseTable(object):
+    """Pointwise cross sections at one temperature, linearly interpolated.
+
+    Tables are generated from windowed multipole data with
+    :meth:`WindowedMultipole.to_pointwise`.
+
+    Parameters
+    ----------
+    name : str
+        Name of the nuclide using the GND naming convention
+    temperature : Real
+        Temperature of the target in K.
+    energy : numpy.ndarray
+        Increasing energies of the table in eV.
+    xs : numpy.ndarray
+        A (3, len(energy)) array of the scattering, absorption, and fission
+        microscopic cross sections.
+    build_time : Real, optional
+        Time in seconds it took to construct the table.
+
+    Attributes
+    ----------
+    name : str
+        Name of the nuclide using the GND naming convention
+    temperature : Real
+        Temperature of the target in K.
+    energy : numpy.ndarray
+        Increasing energies of the table in eV.
+    xs : numpy.ndarray
+        A (3, len(energy)) array of the scattering, absorption, and fission
+        microscopic cross sections.
+    build_time : Real or None
+        Time in seconds it took to construct the table.
+    nbytes : Integral
+        Size of the table in bytes.
+
+    """
+    def __init__(self, name, temperature, energy, xs, build_time=None):
+        check_type('energy', energy, np.ndarray)
+        check_type('xs', xs, np.ndarray)
+        if xs.shape != (3,) + energy.shape:
+            raise ValueError('Pointwise cross sections must have shape (3, {})'
+                             .format(energy.shape[0]))
+        self.name = name
+        self.temperature = temperature
+        self.energy = energy
+        self.xs = xs
+        self.build_time = build_time
+
+    def __len__(self):
+        return self.energy.shape[0]
+
+    def __repr__(self):
+        return ('<PointwiseTable: {} at {} K, {} points, {} bytes, built in '
+                '{:.3f} s>'.format(self.name, self.temperature, len(self),
+                                   self.nbytes, self.build_time or 0.0))
+
+    @property
+    def nbytes(self):
+        return self.energy.nbytes + self.xs.nbytes
+
+    def __call__(self, E):
+        """Linearly interpolate scattering, absorption, and fission cross
+        sections.
+
+        Parameters
+        ----------
+        E : Real or Iterable of Real
+            Energy of the incident neutron in eV.
+
+        Returns
+        -------
+        3-tuple of Real or 3-tuple of numpy.ndarray
+            Scattering, absorption, and fission microscopic cross sections.
+            Energies outside the table give zero cross sections.
+
+        """
+        E = np.asarray(E, dtype=float)
+        return tuple(np.interp(E, self.energy, self.xs[i], left=0.0,
+                               right=0.0) for i in range(3))
+
+
+class TemperatureTable(object):
+    """Pointwise cross sections at several temperatures, interpolated linearly
+    in energy and in sqrt(T) or ln(T).
+
+    Tables are generated from windowed multipole data with
+    :meth:`WindowedMultipole.to_temperature_table`.
+
+    Parameters
+    ----------
+    name : str
+        Name of the nuclide using the GND naming convention
+    temperatures : numpy.ndarray
+        Increasing temperatures of the table in K.
+    energy : numpy.ndarray
+        Increasing energies of the table in eV, shared by all temperatures.
+    xs : numpy.ndarray
+        A (len(temperatures), 3, len(energy)) array of the scattering,
+        absorption, and fission microscopic cross sections.
+    interpolation : {'sqrt', 'log'}
+        Whether to interpolate linearly in sqrt(T) or in ln(T).
+    error : Real, optional
+        Largest relative error of the table against direct evaluation.
+    build_time : Real, optional
+        Time in seconds it took to construct the table.
+
+    Attributes
+    ----------
+    name : str
+        Name of the nuclide using the GND naming convention
+    temperatures : numpy.ndarray
+        Increasing temperatures of the table in K.
+    energy : numpy.ndarray
+        Increasing energies of the table in eV.
+    xs : numpy.ndarray
+        A (len(temperatures), 3, len(energy)) array of the scattering,
+        absorption, and fission microscopic cross sections.
+    interpolation : {'sqrt', 'log'}
+        Whether to interpolate linearly in sqrt(T) or in ln(T).
+    error : Real or None
+        Largest relative error of the table against direct evaluation, as
+        measured when it was built.
+    build_time : Real or None
+        Time in seconds it took to construct the table.
+    nbytes : Integral
+        Size of the table in bytes.
+
+    """
+    def __init__(self, name, temperatures, energy, xs, interpolation='sqrt',
+                 error=None, build_time=None):
+        check_type('temperatures', temperatures, np.ndarray)
+        check_type('energy', energy, np.ndarray)
+        check_type('xs', xs, np.ndarray)
+        check_value('interpolation', interpolation, _TEMPERATURE_INTERPOLATION)
+        if xs.shape != (temperatures.shape[0], 3, energy.shape[0]):
+            raise ValueError('Temperature table cross sections must have '
+                             'shape ({}, 3, {})'.format(temperatures.shape[0],
+                                                        energy.shape[0]))
+        self.name = name
+        self.temperatures = temperatures
+        self.energy = energy
+        self.xs = xs
+        self.interpolation = interpolation
+        self.error = error
+        self.build_time = build_time
+
+    def __len__(self):
+        return self.energy.shape[0]
+
+    def __repr__(self):
+        return ('<TemperatureTable: {} at {} temperatures in [{}, {}] K, {} '
+                'points, {} bytes>'.format(
+                    self.name, self.temperatures.shape[0],
+                    self.temperatures[0], self.temperatures[-1], len(self),
+                    self.nbytes))
+
+    @property
+    def nbytes(self):
+        return self.temperatures.nbytes + self.energy.nbytes + self.xs.nbytes
+
+    @staticmethod
+    def default_path(wmp_path):
+        """Path of the table file next to a library file, e.g.
+        '092238.temperature.hdf5' for '092238.h5'.  The extension keeps table
+        files out of '*.h5' library globs."""
+        return os.path.splitext(wmp_path)[0] + '.temperature.hdf5'
+
+    def __call__(self, E, T):
+        """Interpolate scattering, absorption, and fission cross sections.
+
+        Parameters
+        ----------
+        E : Real or Iterable of Real
+            Energy of the incident neutron in eV.
+        T : Real or Iterable of Real
+            Temperature of the target in K, broadcast against `E`.
+
+        Returns
+        -------
+        numpy.ndarray
+            Scattering, absorption, and fission microscopic cross sections
+            with shape (3,) + the broadcast shape of `E` and `T`.  Energies
+            outside the table give zero cross sections.
+
+        """
+        E, T = np.broadcast_arrays(np.asarray(E, dtype=float),
+                                   np.asarray(T, dtype=float))
+        if np.any(T < self.temperatures[0]) or np.any(T > self.temperatures[-1]):
+            raise ValueError('Temperatures must be within [{}, {}] K'.format(
+                self.temperatures[0], self.temperatures[-1]))
+        shape = E.shape
+        E = E.ravel()
+        T = T.ravel()
+
+        # Bracketing temperature nodes and interpolation weights.
+        to_x = _TEMPERATURE_INTERPOLATION[self.interpolation][0]
+        x_nodes = to_x(self.temperatures)
+        x = to_x(T)
+        i_T = np.clip(np.searchsorted(x_nodes, x, side='right') - 1, 0,
+                      x_nodes.shape[0] - 2)
+        f_T = (x - x_nodes[i_T]) / (x_nodes[i_T + 1] - x_nodes[i_T])
+
+        # Bracketing energies and interpolation weights.
+        energy = self.energy
+        inside = (E >= energy[0]) & (E <= energy[-1])
+        i_E = np.clip(np.searchsorted(energy, E, side='right') - 1, 0,
+                      energy.shape[0] - 2)
+        f_E = (E - energy[i_E]) / (energy[i_E + 1] - energy[i_E])
+
+        sig = np.empty((3, E.shape[0]))
+        for i_xs in range(3):
+            xs = self.xs[:, i_xs]
+            lo = (1.0 - f_E) * xs[i_T, i_E] + f_E * xs[i_T, i_E + 1]
+            hi = (1.0 - f_E) * xs[i_T + 1, i_E] + f_E * xs[i_T + 1, i_E + 1]
+            sig[i_xs] = np.where(inside, (1.0 - f_T) * lo + f_T * hi, 0.0)
+        return sig.reshape((3,) + shape)
+
+    def export_to_hdf5(self, path, libver='earliest'):
+        """Export the table to an HDF5 file, e.g. at :meth:`default_path`.
+
+        Parameters
+        ----------
+        path : str
+            Path to write HDF5 file to
+        libver : {'earliest', 'latest'}
+            Compatibility mode for the HDF5 file. 'latest' will produce files
+            that are less backwards compatible but have performance benefits.
+
+        """
+        with h5py.File(path, 'w', libver=libver) as f:
+            f.attrs['filetype'] = np.bytes_(b'data_wmp_temperature_table')
+            f.attrs['version'] = np.array(WMP_VERSION)
+            f.attrs['name'] = np.bytes_(self.name.encode())
+            f.attrs['interpolation'] = np.bytes_(self.interpolation.encode())
+            if self.error is not None:
+                f.attrs['error'] = self.error
+            if self.build_time is not None:
+                f.attrs['build_time'] = self.build_time
+            f.create_dataset('temperatures', data=self.temperatures)
+            f.create_dataset('energy', data=self.energy)
+            f.create_dataset('xs', data=self.xs)
+
+    @classmethod
+    def from_hdf5(cls, path):
+        """Load a table written by :meth:`export_to_hdf5`.
+
+        Parameters
+        ----------
+        path : str
+            Path of the HDF5 file.
+
+        Returns
+        -------
+        TemperatureTable
+            The table.
+
+        """
+        with h5py.File(path, 'r') as f:
+            filetype = f.attrs.get('filetype', b'')
+            if not isinstance(filetype, bytes):
+                filetype = filetype.encode()
+            if filetype != b'data_wmp_temperature_table':
+                raise IOError('"{}" is not a WMP temperature table'.format(
+                    path))
+            major, minor = f.attrs['version']
+            if major != WMP_VERSION_MAJOR:
+                raise IOError('WMP temperature table uses version {}.{} '
+                              'whereas this module expects version {}.x.'
+                              .format(major, minor, WMP_VERSION_MAJOR))
+            attrs = {key: f.attrs[key] for key in f.attrs}
+            for key in ('name', 'interpolation'):
+                if isinstance(attrs[key], bytes):
+                    attrs[key] = attrs[key].decode()
+            return cls(attrs['name'], f['temperatures'][()], f['energy'][()],
+                       f['xs'][()], attrs['interpolation'],
+                       attrs.get('error'), attrs.get('build_time'))
+
+
+class XSCache(object):
+    """Persistent on-disk cache of evaluated cross sections.
+
+    Results of :meth:`WindowedMultipole.__call__` are stored as ``.npy`` files
+    in a cache directory, keyed by a hash of the nuclide's data, the
+    temperature, the energy grid and the Faddeeva mode.  Entries are written
+    to a temporary file and atomically renamed, so several processes can share
+    one cache directory.  When the cache grows beyond `max_bytes`, the least
+    recently used entries are deleted.
+
+    Parameters
+    ----------
+    path : str
+        Cache directory.  It is created if it does not exist.
+    max_bytes : Integral, optional
+        Maximum total size of the cache entries.  Unlimited by default.
+
+    Attributes
+    ----------
+    path : str
+        Cache directory.
+    max_bytes : Integral or None
+        Maximum total size of the cache entries.
+    hits : Integral
+        Number of lookups answered from the cache by this object.
+    misses : Integral
+        Number of lookups this object had to evaluate.
+    nbytes : Integral
+        Total size of the cache entries in bytes.
+
+    """
+    def __init__(self, path, max_bytes=None):
+        if max_bytes is not None:
+            check_type('max_bytes', max_bytes, Integral)
+            check_greater_than('max_bytes', max_bytes, 0)
+        # Several processes may create the directory at once.
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, nuc, E, T):
+        """Compute scattering, absorption, and fission cross sections through
+        the cache.
+
+        Parameters
+        ----------
+        nuc : WindowedMultipole
+            Nuclide to evaluate.
+        E : Real or Iterable of Real
+            Energy of the incident neutron in eV.
+        T : Real
+            Temperature of the target in K.
+
+        Returns
+        -------
+        3-tuple of Real or 3-tuple of numpy.ndarray
+            Total, absorption, and fission microscopic cross sections at the
+            given energy and temperature, as from
+            :meth:`WindowedMultipole.__call__`.
+
+        """
+        E = np.asarray(E, dtype=float)
+        filename = os.path.join(self.path, self.key(nuc, E, T) + '.npy')
+
+        try:
+            sig = np.load(filename)
+            os.utime(filename)
+        except (IOError, OSError, ValueError, EOFError):
+            # Missing, or evicted or replaced by another process meanwhile.
+            sig = None
+        if sig is not None and sig.shape == (3,) + E.shape:
+            self.hits += 1
+            return tuple(sig[i, ...] for i in range(3))
+
+        self.misses += 1
+        sig = np.array(nuc(E, T))
+        fd, tmp_filename = tempfile.mkstemp(suffix='.tmp', dir=self.path)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, sig)
+            os.replace(tmp_filename, filename)
+        except BaseException:
+            if os.path.exists(tmp_filename):
+                os.remove(tmp_filename)
+            raise
+        self._evict()
+        return tuple(sig[i, ...] for i in range(3))
+
+    @property
+    def nbytes(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def key(self, nuc, E, T):
+        """Compute the cache key of an evaluation.
+
+        Parameters
+        ----------
+        nuc : WindowedMultipole
+            Nuclide to evaluate.
+        E : numpy.ndarray
+            Energies of the incident neutron in eV.
+        T : Real
+            Temperature of the target in K.
+
+        Returns
+        -------
+        str
+            Hexadecimal SHA-256 digest.
+
+        """
+        E = np.ascontiguousarray(E, dtype=float)
+        sha = hashlib.sha256()
+        sha.update(nuc.digest().encode())
+        sha.update(repr((float(T), nuc.faddeeva_mode, E.shape)).encode())
+        sha.update(E.data)
+        return sha.hexdigest()
+
+    def clear(self):
+        """Delete all cache entries."""
+        for filename, _, _ in self._entries():
+            try:
+                os.remove(filename)
+            except OSError:
+                pass
+
+    def _entries(self):
+        entries = []
+        for filename in glob.glob(os.path.join(self.path, '*.npy')):
+            try:
+                stat = os.stat(filename)
+            except OSError:
+                continue
+            entries.append((filename, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict(self):
+        if self.max_bytes is None:
+            return
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for filename, size, _ in sorted(entries, key=lambda e: e[2]):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(filename)
+            except OSError:
+                # Already evicted by another process.
+                pass
+            total -= size
+
+
+class Material(object):
+    """Macroscopic cross sections of a mixture of windowed multipole nuclides.
+
+    The square roots and inverses of the energies are computed once for all
+    nuclides, and every nuclide's density-weighted cross sections are added
+    into one output array in place.
+
+    Parameters
+    ----------
+    nuclides : dict
+        Atom densities in atom/b-cm keyed by :class:`WindowedMultipole`, or by
+        nuclide name or ZAID if `library` is given.
+    library : WMPLibrary or dict, optional
+        Where to look up nuclides given by name or ZAID.
+
+    Attributes
+    ----------
+    nuclides : collections.OrderedDict
+        Atom densities in atom/b-cm keyed by :class:`WindowedMultipole`.
+
+    """
+    def __init__(self, nuclides, library=None):
+        self.nuclides = OrderedDict()
+        for nuc, density in nuclides.items():
+            if not isinstance(nuc, WindowedMultipole):
+                if library is None:
+                    raise TypeError('Nuclide "{}" is not a WindowedMultipole '
+                                    'and no library is given'.format(nuc))
+                nuc = library[nuc]
+            check_type('density of {}'.format(nuc.name), density, Real)
+            check_greater_than('density of {}'.format(nuc.name), density, 0.,
+                               equality=True)
+            self.nuclides[nuc] = density
+
+    def __len__(self):
+        return len(self.nuclides)
+
+    def __call__(self, E, T, breakdown=False):
+        """Compute macroscopic scattering, absorption, and fission cross
+        sections.
+
+        Parameters
+        ----------
+        E : Real or Iterable of Real
+            Energy of the incident neutron in eV.
+        T : Real
+            Temperature of the material in K.
+        breakdown : bool
+            Whether to also return each nuclide's contribution.
+
+        Returns
+        -------
+        3-tuple of numpy.ndarray
+            Scattering, absorption, and fission macroscopic cross sections in
+            1/cm at the given energy and temperature.
+        collections.OrderedDict
+            Only if `breakdown` is set, the 3-tuple of each nuclide's
+            macroscopic cross sections keyed by nuclide name.
+
+        """
+
+        E = np.asarray(E, dtype=float)
+        energy = E.ravel()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sqrtE = np.sqrt(energy)
+            invE = 1.0 / energy
+
+        sig = np.zeros((3, energy.shape[0]))
+        parts = OrderedDict()
+        for nuc, density in self.nuclides.items():
+            grid = nuc._prepare(energy, sqrtE, invE)
+            if breakdown:
+                part = nuc._evaluate_prepared(grid, T, scale=density)
+                sig += part
+                parts[nuc.name] = tuple(part[i].reshape(E.shape)
+                                        for i in range(3))
+            else:
+                nuc._evaluate_prepared(grid, T, sig, density)
+
+        sig = tuple(sig[i].reshape(E.shape) for i in range(3))
+        if breakdown:
+            return sig, parts
+        return sig
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import json
+import time
+import platform
+import subprocess
+import tracemalloc
+
+import numpy as np
+
+import WMP
+
+from optparse import OptionParser
+
+WMP_PATH = "../WMP_Library" # WMP library PATH
+NUCLIDES = "H1,O16,U235,U238,Pu239" # representative nuclides
+TEMPERATURE = 293.6
+N_POINTS = 10000
+N_SCALAR = 1000
+REPEAT = 5
+
+
+def measure(func, repeat):
+  """Best wall time of func over repeat calls, and its peak traced memory."""
+  func()  # warm up, e.g. the compiled pole layout
+  times = []
+  for i in range(repeat):
+    start = time.perf_counter()
+    func()
+    times.append(time.perf_counter() - start)
+
+  tracemalloc.start()
+  func()
+  peak = tracemalloc.get_traced_memory()[1]
+  tracemalloc.stop()
+  return min(times), peak
+
+
+def log_grid(nuc, n_points):
+  energy = np.logspace(np.log10(nuc.E_min), np.log10(nuc.E_max), n_points)
+  energy[0] = nuc.E_min
+  energy[-1] = nuc.E_max
+  return energy
+
+
+def benchmark_nuclide(wmp_library, temperatures, n_points, n_scalar, repeat,
+                      n_threads=1):
+  """Run every benchmark on one nuclide. Returns a list of result dicts."""
+  nuc = WMP.WindowedMultipole.from_hdf5(wmp_library)
+  nuc_fast = WMP.WindowedMultipole.from_hdf5(wmp_library, faddeeva_mode='fast')
+  info = {'nuclide': nuc.name, 'wmp_file': os.path.basename(wmp_library),
+          'fissionable': bool(nuc.fissionable),
+          'n_poles': int(nuc.data.shape[0]),
+          'n_windows': int(nuc.windows.shape[0])}
+  results = []
+
+  def add(name, T, n, func):
+    elapsed, peak = measure(func, repeat)
+    result = dict(info)
+    result.update({'benchmark': name, 'temperature': T, 'n_points': n,
+                   'time': elapsed, 'points_per_sec': n/elapsed,
+                   'peak_memory': peak})
+    results.append(result)
+
+  add('from_hdf5', None, 1, lambda: WMP.WindowedMultipole.from_hdf5(wmp_library))
+
+  energy = log_grid(nuc, n_points)
+  # scalar evaluations at random energies of the same grid
+  scalar_energy = np.random.RandomState(1).choice(energy, n_scalar).tolist()
+  # the same grid in random order, like a batch of Monte Carlo queries
+  random_energy = np.random.RandomState(1).permutation(energy)
+  for T in temperatures:
+    add('_evaluate', T, n_scalar,
+        lambda: [nuc._evaluate(E, T) for E in scalar_energy])
+    if T > 0.:
+      # the fast Faddeeva mode only differs at temperature
+      add('_evaluate fast', T, n_scalar,
+          lambda: [nuc_fast._evaluate(E, T) for E in scalar_energy])
+    add('__call__', T, n_points, lambda: nuc(energy, T))
+    add('__call__ random', T, n_points, lambda: nuc(random_energy, T))
+    # one thread as well, so the threaded speedup can be read off the results
+    add('evaluate_chunked 1 threads', T, n_points,
+        lambda: nuc.evaluate_chunked(energy, T))
+    if n_threads > 1:
+      add('evaluate_chunked {} threads'.format(n_threads), T, n_points,
+          lambda: nuc.evaluate_chunked(energy, T, n_threads=n_threads))
+
+  return results
+
+
+def metadata():
+  """Describe the environment so results of different commits compare."""
+  info = {'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+          'python': platform.python_version(),
+          'numpy': np.__version__,
+          'machine': platform.machine(),
+          'processor': platform.processor()}
+  try:
+    info['commit'] = subprocess.check_output(
+      ['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+      stderr=subprocess.DEVNULL).decode().strip()
+  except (OSError, subprocess.CalledProcessError):
+    pass
+  return info
+
+
+if __name__ == '__main__':
+  # Command line parsing
+  usage = """usage: %prog [options]"""
+  parser = OptionParser(usage=usage)
+  parser.add_option('-w', '--wmp_directory', dest='wmpdir', default=WMP_PATH,
+                    help="Directory for windowed multipole library. "
+                    "Default: {}".format(WMP_PATH))
+  parser.add_option('-n', '--nuclides', dest='nuclides', default=NUCLIDES,
+                    help="Comma separated nuclides to benchmark. "
+                    "Default: {}".format(NUCLIDES))
+  parser.add_option('-o', '--output', dest='output',
+                    help="JSON output file. Default: stdout")
+  parser.add_option('-t', '--temperature', dest='temp', default=TEMPERATURE,
+                    type='float', help="Finite temperature to benchmark, "
+                    "0 K is always included. Default: {}".format(TEMPERATURE))
+  parser.add_option('-p', '--points', dest='points', default=N_POINTS,
+                    type='int', help="Number of energies of the log grid. "
+                    "Default: {}".format(N_POINTS))
+  parser.add_option('-s', '--scalar_points', dest='scalar', default=N_SCALAR,
+                    type='int', help="Number of scalar evaluations. "
+                    "Default: {}".format(N_SCALAR))
+  parser.add_option('-r', '--repeat', dest='repeat', default=REPEAT,
+                    type='int', help="Number of timed repetitions, the best "
+                    "is reported. Default: {}".format(REPEAT))
+  parser.add_option('-j', '--threads', dest='threads',
+                    default=os.cpu_count() or 1, type='int',
+                    help="Also benchmark threaded chunked evaluation with "
+                    "this many threads. Default: number of CPUs")
+  (options, args) = parser.parse_args()
+
+  library = WMP.WMPLibrary(options.wmpdir)
+  temperatures = [0., options.temp]
+
+  results = []
+  for nuc_name in options.nuclides.split(','):
+    wmp_library = library.filename(nuc_name)
+    print("Benchmarking {} {} - {}".format(nuc_name, wmp_library, time.ctime()),
+          file=sys.stderr)
+    results += benchmark_nuclide(wmp_library, temperatures, options.points,
+                                 options.scalar, options.repeat,
+                                 options.threads)
+
+  output = json.dumps({'metadata': metadata(), 'results': results}, indent=2)
+  if options.output is not None:
+    with open(options.output, 'w') as f:
+      f.write(output + '\n')
+  else:
+    print(output)
@@ -6,43 +6,74 @@ import numpy as np
 
 import WMP
 
-wmp_dir = "../WMP_Library" # WMP library PATH
-wmp_files = glob.glob(os.path.join(wmp_dir, "*.h5"))
-wmp_files.sort()
-
-nuclides = []
-headers = [
-          'Nuclide',
-          'WMP File',
-          'Energy Range',
-          '# Poles',
-          '# Windows',
-          'CF Order',
-         ]
-
-for i, wmp_library in enumerate(wmp_files):
-  result = []
-  nuc_wmp = WMP.WindowedMultipole.from_hdf5(wmp_library)
-  nuc_name = nuc_wmp.name
-  wmp_name = os.path.basename(wmp_library)
-
-  result.append(nuc_name)
-  result.append(wmp_name)
-  result.append("[{:e}, {:e}]".format(nuc_wmp.E_min, nuc_wmp.E_max))
-  result.append("{}".format(nuc_wmp.data.shape[0]))
-  n_wins = nuc_wmp.windows.shape[0]
-  result.append("{}".format(n_wins))
-  result.append("{}".format(nuc_wmp.fit_order))
-
-  nuclides.append(result)
-
-# dump nuclides
-output_file = '../nuclides.md'
-format_str = '| {:8} | {:11} | {:28} | {:7} | {:9} | {:8} |\n'
-table_sep = ['-'*8, '-'*11, '-'*28, '-'*7, '-'*9, '-'*8]
-with open(output_file, 'w') as f:
-  f.write('# WMP Library Overview\n\n')
-  f.write(format_str.format(*headers))
-  f.write(format_str.format(*table_sep))
-  for nuc in nuclides:
-    f.write(format_str.format(*nuc))
+from optparse import OptionParser
+
+WMP_PATH = "../WMP_Library" # WMP library PATH
+OUT_FILE = "../nuclides.md" # OUTPUT file
+
+if __name__ == '__main__':
+  # Command line parsing
+  usage = """usage: %prog [options]"""
+  parser = OptionParser(usage=usage)
+  parser.add_option('-w', '--wmp_directory', dest='wmpdir', default=WMP_PATH,
+                    help="Directory for windowed multipole library. "
+                    "Default: {}".format(WMP_PATH))
+  parser.add_option('-o', '--output', dest='output', default=OUT_FILE,
+                    help="Output file. Default: {}".format(OUT_FILE))
+  parser.add_option('-e', '--extended', dest='extended', action='store_true',
+                    default=False, help="Add the memory footprint and the "
+                    "average/max number of poles per window.")
+  parser.add_option('-j', '--jobs', dest='jobs', type='int',
+                    help="Number of files scanned in parallel. "
+                    "Default: number of processors")
+  (options, args) = parser.parse_args()
+
+  wmp_dir = options.wmpdir
+  wmp_files = glob.glob(os.path.join(wmp_dir, "*.h5"))
+  wmp_files.sort()
+
+  nuclides = []
+  headers = [
+            'Nuclide',
+            'WMP File',
+            'Energy Range',
+            '# Poles',
+            '# Windows',
+            'CF Order',
+           ]
+  format_str = '| {:8} | {:11} | {:28} | {:7} | {:9} | {:8} |'
+  table_sep = ['-'*8, '-'*11, '-'*28, '-'*7, '-'*9, '-'*8]
+  if options.extended:
+    headers += ['Memory (kB)', 'Avg Poles/Win', 'Max Poles/Win']
+    format_str += ' {:11} | {:13} | {:13} |'
+    table_sep += ['-'*11, '-'*13, '-'*13]
+  format_str += '\n'
+
+  # only the headers are read, not the pole and curvefit arrays
+  wmp_headers = WMP.scan_library(wmp_files, options.extended, options.jobs)
+
+  for wmp_library, header in zip(wmp_files, wmp_headers):
+    result = []
+    nuc_name = header['name']
+    wmp_name = os.path.basename(wmp_library)
+
+    result.append(nuc_name)
+    result.append(wmp_name)
+    result.append("[{:e}, {:e}]".format(header['E_min'], header['E_max']))
+    result.append("{}".format(header['n_poles']))
+    result.append("{}".format(header['n_windows']))
+    result.append("{}".format(header['fit_order']))
+    if options.extended:
+      result.append("{:.1f}".format(header['nbytes']/1024))
+      result.append("{:.2f}".format(header['mean_poles_per_window']))
+      result.append("{}".format(header['max_poles_per_window']))
+
+    nuclides.append(result)
+
+  # dump nuclides
+  with open(options.output, 'w') as f:
+    f.write('# WMP Library Overview\n\n')
+    f.write(format_str.format(*headers))
+    f.write(format_str.format(*table_sep))
+    for nuc in nuclides:
+      f.write(format_str.format(*nuc))
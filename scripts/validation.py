@@ -3,11 +3,10 @@
 import os
 import glob
 import time
-import numpy as np
-import matplotlib
-matplotlib.use("agg")
-import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
+import h5py
+import numpy as np
 import openmc.data
 import WMP
 
@@ -18,159 +17,327 @@ ACE_PATH = "../../njoy_293.75K" # ACE library PATH
 OUT_PATH = "../WMP_Validation" # OUTPUT PATH
 TEMPERATURE = 293.75
 
-# Command line parsing
-usage = """usage: %prog [options]"""
-parser = OptionParser(usage=usage)
-parser.add_option('-w', '--wmp_directory', dest='wmpdir', default=WMP_PATH,
-                  help="Directory for windowed multipole library. "
-                  "Default: {}".format(WMP_PATH))
-parser.add_option('-f', '--wmp_file', dest='wmpfile',
-                  help="Specify the wmp file to process. ")
-parser.add_option('-a', '--ace_directory', dest='acedir', default=ACE_PATH,
-                  help="Directory for ACE library. "
-                  "Default: {}".format(ACE_PATH))
-parser.add_option('-o', '--out_directory', dest='outdir', default=OUT_PATH,
-                  help="Directory for outputs. "
-                  "Default: {}".format(OUT_PATH))
-parser.add_option('-t', '--temperature', dest='temp', default=TEMPERATURE,
-                  type='float', help="Temperature to compare. "
-                  "Default: {}".format(TEMPERATURE))
-(options, args) = parser.parse_args()
-
-wmp_dir = options.wmpdir
-ace_dir = options.acedir
-out_dir = options.outdir
-temp = options.temp
-strTemp = "{}K".format(int(round(temp)))
-
-if options.wmpfile is not None:
-  assert os.path.isfile(options.wmpfile), "wmp library {} not found".format(options.wmpfile)
-  wmp_files = [options.wmpfile]
-else:
-  assert os.path.exists(wmp_dir), "wmp library dir {} not found".format(wmp_dir)
-  wmp_files = glob.glob(os.path.join(wmp_dir, "*.h5"))
-
-assert os.path.exists(ace_dir), "ace library dir {} not found".format(ace_dir)
-
-if not os.path.exists(out_dir):
-  os.makedirs(out_dir)
-
-print("Start validating {} nuclides - {}".format(len(wmp_files), time.ctime()))
-for i, wmp_library in enumerate(wmp_files):
+# reactions for comparison
+MTS = [1, 2, 27, 18]
+REACTIONS = ['total', 'elastic', 'absorption', 'fission']
+
+
+def pole_count(wmp_library):
+  """Number of poles of a WMP file, read from the dataset shape only."""
+  return WMP.read_wmp_header(wmp_library)['n_poles']
+
+
+def validate_nuclide(wmp_library, ace_dir, out_dir, temp, cache_dir=None,
+                     cache_size=None):
+  """Compare one WMP nuclide against ACE data.
+
+  Everything is written to the nuclide's own log file in out_dir. Returns a
+  summary dict with the nuclide name, the max rel. error of each reaction
+  (None if the ACE data has no such reaction), whether negative WMP cross
+  sections were found, the wall time, the energy grid and the compared
+  cross sections of each reaction under 'results'.
+  """
+  start = time.time()
+  strTemp = "{}K".format(int(round(temp)))
+
   # load wmp data
   nuc_wmp = WMP.WindowedMultipole.from_hdf5(wmp_library)
   nuc_name = nuc_wmp.name
 
-  print("{:>3}/{:<3} Processing {} {} - {} ".format(
-          i+1, len(wmp_files), nuc_name, wmp_library, time.ctime()))
-
   ace_file = os.path.join(ace_dir, nuc_name+'.h5')
   assert os.path.isfile(ace_file), "ace_file {} not found".format(ace_file)
 
   logfile_name = '{}_{}K_validation.log'.format(nuc_name, temp)
-  logfile = os.path.join(out_dir, logfile_name);
-  f = open(logfile, 'w');
-
-  # write info
-  f.write("WMP file: {}\n".format(wmp_library))
-  f.write("Nuclide: {}\n".format(nuc_name))
-  f.write("Energy range: [{}, {}] eV\n".format(nuc_wmp.E_min, nuc_wmp.E_max))
-  f.write("Number of windows: {}\n".format(nuc_wmp.windows.shape[0]))
-  f.write("Fissionable: {}\n".format(nuc_wmp.fissionable))
-
-  # load ace data
-  nuc_ace = openmc.data.IncidentNeutron.from_hdf5(ace_file)
-  assert strTemp in nuc_ace.temperatures, "ace file does not contain T={}".format(strTemp)
-
-  f.write("Load ace file: {}\n".format(ace_file))
-
-  # energy grid for comparison
-  max_e = nuc_wmp.E_max
-  min_e = nuc_wmp.E_min
-  N_points = 1E4
-  energy = np.logspace(np.log10(min_e), np.log10(max_e), N_points)
-  energy[0] = min_e
-  energy[-1] = max_e
-  f.write("Test energy range: [{}, {}] eV\n".format(energy[0], energy[-1]))
-  f.write("Test temperature: {} K\n".format(temp))
-
-  # reactions for comparison
-  mts = [1, 2, 27, 18]
-  reactions = ['total', 'elastic', 'absorption', 'fission']
-
-  # compute cross sections
-  xs_wmp = np.zeros((len(mts), len(energy)))
-  xs_ace = np.zeros((len(mts), len(energy)))
-
-  xs_wmp[[1,2,3], :] = nuc_wmp(energy, temp)
-  xs_wmp[0, :] = xs_wmp[1, :] + xs_wmp[2, :]
-  for i, mt in enumerate(mts):
-    if mt in nuc_ace:
-      xs_ace[i, :] = nuc_ace[mt].xs[strTemp](energy)
-
-  if np.any(xs_wmp < 0.):
-    print("!!! Found negative cross sections in WMP library!")
-
-  # compare
-  for i, rxn in enumerate(reactions):
-    print("  -- {} cross section".format(rxn))
-    rxn_wmp = xs_wmp[i]
-    rxn_ace = xs_ace[i]
-    error = abs(rxn_wmp - rxn_ace)
-
-    if not rxn_ace.any():
-      continue
-
-    # max abs. error
-    max_error = max(error)
-    max_error_idx = np.argmax(error)
-    max_error_energy = energy[max_error_idx]
-    max_error_wmpxs = rxn_wmp[max_error_idx]
-    max_error_acexs = rxn_ace[max_error_idx]
-    f.write("{} - max abs error:\n".format(rxn))
-    f.write("  energy: {}\n".format(max_error_energy))
-    f.write("  WMP xs: {}\n".format(max_error_wmpxs))
-    f.write("  ACE xs: {}\n".format(max_error_acexs))
-    f.write("  error : {}\n".format(max_error))
-
-    # max rel. error
-    relerr = abs(rxn_wmp/rxn_ace - 1)
-    relerr[rxn_ace == 0] = 0
-    relerr2 = np.array(relerr)
-    relerr2[error <= 1E-5] = 0
-    max_error = max(relerr2)
-    max_error_idx = np.argmax(relerr2)
-    max_error_energy = energy[max_error_idx]
-    max_error_wmpxs = rxn_wmp[max_error_idx]
-    max_error_acexs = rxn_ace[max_error_idx]
-    f.write("{} - max rel error:\n".format(rxn))
-    f.write("  energy: {}\n".format(max_error_energy))
-    f.write("  WMP xs: {}\n".format(max_error_wmpxs))
-    f.write("  ACE xs: {}\n".format(max_error_acexs))
-    f.write("  error : {:.2f}%\n".format(max_error*100))
-
-    # plot
-    plt.clf()
-    fig, ax1 = plt.subplots()
-    lns1 = ax1.loglog(energy, rxn_wmp, 'g', label="WMP xs")
-    lns2 = ax1.loglog(energy, rxn_ace, 'b', label="ACE xs")
-    ax2 = ax1.twinx()
-    lns3 = ax2.loglog(energy, relerr, 'r', label="rel. err.", alpha=0.5)
-    lns = lns1 + lns2 + lns3
-    labels = [l.get_label() for l in lns]
-    ax1.legend(lns, labels, loc='best')
-    ax1.set_xlabel('energy (eV)')
-    ax1.set_ylabel('cross section (b)', color='b')
-    ax1.tick_params('y', colors='b')
-    ax2.set_ylabel('relative error', color='r')
-    ax2.tick_params('y', colors='r')
-
-    plt.title("{} {} xs {}K".format(nuc_name, rxn, temp))
-    fig.tight_layout()
-    figfile = os.path.join(out_dir, "{}_validation_{}K_{}.png".format(nuc_name, temp, rxn))
-    plt.savefig(figfile, dpi=600)
-    plt.close()
-
-  f.close()
-
-print("Done! - {}".format(time.ctime()))
+  logfile = os.path.join(out_dir, logfile_name)
+  summary = {'nuclide': nuc_name, 'wmp_file': wmp_library,
+             'max_rel_error': {}, 'negative': False}
+  results = {}
+
+  with open(logfile, 'w') as f:
+    # write info
+    f.write("WMP file: {}\n".format(wmp_library))
+    f.write("Nuclide: {}\n".format(nuc_name))
+    f.write("Energy range: [{}, {}] eV\n".format(nuc_wmp.E_min, nuc_wmp.E_max))
+    f.write("Number of windows: {}\n".format(nuc_wmp.windows.shape[0]))
+    f.write("Fissionable: {}\n".format(nuc_wmp.fissionable))
+
+    # load ace data
+    nuc_ace = openmc.data.IncidentNeutron.from_hdf5(ace_file)
+    assert strTemp in nuc_ace.temperatures, "ace file does not contain T={}".format(strTemp)
+
+    f.write("Load ace file: {}\n".format(ace_file))
+
+    # energy grid for comparison
+    max_e = nuc_wmp.E_max
+    min_e = nuc_wmp.E_min
+    N_points = 10000
+    energy = np.logspace(np.log10(min_e), np.log10(max_e), N_points)
+    energy[0] = min_e
+    energy[-1] = max_e
+    f.write("Test energy range: [{}, {}] eV\n".format(energy[0], energy[-1]))
+    f.write("Test temperature: {} K\n".format(temp))
+
+    # compute cross sections
+    xs_wmp = np.zeros((len(MTS), len(energy)))
+    xs_ace = np.zeros((len(MTS), len(energy)))
+
+    if cache_dir is not None:
+      cache = WMP.XSCache(cache_dir, cache_size)
+      xs_wmp[[1,2,3], :] = cache(nuc_wmp, energy, temp)
+    else:
+      xs_wmp[[1,2,3], :] = nuc_wmp(energy, temp)
+    xs_wmp[0, :] = xs_wmp[1, :] + xs_wmp[2, :]
+    for i, mt in enumerate(MTS):
+      if mt in nuc_ace:
+        xs_ace[i, :] = nuc_ace[mt].xs[strTemp](energy)
+
+    if np.any(xs_wmp < 0.):
+      f.write("!!! Found negative cross sections in WMP library!\n")
+      summary['negative'] = True
+
+    # compare
+    for i, rxn in enumerate(REACTIONS):
+      f.write("-- {} cross section\n".format(rxn))
+      rxn_wmp = xs_wmp[i]
+      rxn_ace = xs_ace[i]
+      error = abs(rxn_wmp - rxn_ace)
+
+      if not rxn_ace.any():
+        summary['max_rel_error'][rxn] = None
+        continue
+
+      # max abs. error
+      max_error = max(error)
+      max_error_idx = np.argmax(error)
+      max_error_energy = energy[max_error_idx]
+      max_error_wmpxs = rxn_wmp[max_error_idx]
+      max_error_acexs = rxn_ace[max_error_idx]
+      f.write("{} - max abs error:\n".format(rxn))
+      f.write("  energy: {}\n".format(max_error_energy))
+      f.write("  WMP xs: {}\n".format(max_error_wmpxs))
+      f.write("  ACE xs: {}\n".format(max_error_acexs))
+      f.write("  error : {}\n".format(max_error))
+
+      # max rel. error
+      relerr = abs(rxn_wmp/rxn_ace - 1)
+      relerr[rxn_ace == 0] = 0
+      relerr2 = np.array(relerr)
+      relerr2[error <= 1E-5] = 0
+      max_error = max(relerr2)
+      max_error_idx = np.argmax(relerr2)
+      max_error_energy = energy[max_error_idx]
+      max_error_wmpxs = rxn_wmp[max_error_idx]
+      max_error_acexs = rxn_ace[max_error_idx]
+      f.write("{} - max rel error:\n".format(rxn))
+      f.write("  energy: {}\n".format(max_error_energy))
+      f.write("  WMP xs: {}\n".format(max_error_wmpxs))
+      f.write("  ACE xs: {}\n".format(max_error_acexs))
+      f.write("  error : {:.2f}%\n".format(max_error*100))
+      summary['max_rel_error'][rxn] = max_error
+      results[rxn] = {'wmp': rxn_wmp, 'ace': rxn_ace, 'relerr': relerr}
+
+  summary['time'] = time.time() - start
+  summary['energy'] = energy
+  summary['results'] = results
+  return summary
+
+
+def write_results(summary, h5file):
+  """Store the compared cross sections of one nuclide in the results file."""
+  group = h5file.create_group(summary['nuclide'])
+  group.attrs['wmp_file'] = summary['wmp_file']
+  group.attrs['negative'] = summary['negative']
+  group.attrs['time'] = summary['time']
+  group.create_dataset('energy', data=summary['energy'], compression='gzip')
+  for rxn, results in summary['results'].items():
+    rxn_group = group.create_group(rxn)
+    rxn_group.attrs['max_rel_error'] = summary['max_rel_error'][rxn]
+    for key, value in results.items():
+      rxn_group.create_dataset(key, data=value, compression='gzip')
+
+
+def plot_reaction(results_file, nuc_name, rxn, temp, out_dir, dpi=600):
+  """Plot the WMP and ACE cross sections of one reaction from a results file."""
+  # matplotlib is only needed for rendering, numerics-only runs go without it
+  import matplotlib
+  matplotlib.use("agg")
+  import matplotlib.pyplot as plt
+
+  with h5py.File(results_file, 'r') as h5file:
+    energy = h5file[nuc_name]['energy'][()]
+    rxn_group = h5file[nuc_name][rxn]
+    rxn_wmp = rxn_group['wmp'][()]
+    rxn_ace = rxn_group['ace'][()]
+    relerr = rxn_group['relerr'][()]
+
+  fig, ax1 = plt.subplots()
+  lns1 = ax1.loglog(energy, rxn_wmp, 'g', label="WMP xs")
+  lns2 = ax1.loglog(energy, rxn_ace, 'b', label="ACE xs")
+  ax2 = ax1.twinx()
+  lns3 = ax2.loglog(energy, relerr, 'r', label="rel. err.", alpha=0.5)
+  lns = lns1 + lns2 + lns3
+  labels = [l.get_label() for l in lns]
+  ax1.legend(lns, labels, loc='best')
+  ax1.set_xlabel('energy (eV)')
+  ax1.set_ylabel('cross section (b)', color='b')
+  ax1.tick_params('y', colors='b')
+  ax2.set_ylabel('relative error', color='r')
+  ax2.tick_params('y', colors='r')
+
+  plt.title("{} {} xs {}K".format(nuc_name, rxn, temp))
+  fig.tight_layout()
+  figfile = os.path.join(out_dir, "{}_validation_{}K_{}.png".format(nuc_name, temp, rxn))
+  plt.savefig(figfile, dpi=dpi)
+  plt.close(fig)
+  return figfile
+
+
+def render_results(results_file, out_dir, threshold=0., dpi=600, jobs=1):
+  """Plot every reaction of a results file whose max rel. error is at least
+  threshold. Returns the list of figure files."""
+  with h5py.File(results_file, 'r') as h5file:
+    temp = h5file.attrs['temperature']
+    plots = [(nuc_name, rxn) for nuc_name, group in h5file.items()
+             for rxn, rxn_group in group.items()
+             if isinstance(rxn_group, h5py.Group)
+             and rxn_group.attrs['max_rel_error'] >= threshold]
+
+  if jobs == 1:
+    return [plot_reaction(results_file, nuc_name, rxn, temp, out_dir, dpi)
+            for nuc_name, rxn in plots]
+  with ProcessPoolExecutor(max_workers=jobs) as executor:
+    futures = [executor.submit(plot_reaction, results_file, nuc_name, rxn,
+                               temp, out_dir, dpi) for nuc_name, rxn in plots]
+    return [future.result() for future in futures]
+
+
+def write_summary(summaries, filename, temp):
+  """Merge the per-nuclide summaries into one table."""
+  format_str = '| {:8} | {:11} | {:10} | {:10} | {:10} | {:10} | {:8} | {:8} |\n'
+  headers = ['Nuclide', 'WMP File'] + REACTIONS + ['Neg. xs', 'Time (s)']
+  table_sep = ['-'*8, '-'*11] + ['-'*10]*4 + ['-'*8, '-'*8]
+  with open(filename, 'w') as f:
+    f.write('# WMP Validation Summary at {} K\n\n'.format(temp))
+    f.write(format_str.format(*headers))
+    f.write(format_str.format(*table_sep))
+    for s in sorted(summaries, key=lambda s: s['nuclide']):
+      errors = []
+      for rxn in REACTIONS:
+        err = s['max_rel_error'].get(rxn)
+        errors.append('-' if err is None else '{:.4f}%'.format(err*100))
+      f.write(format_str.format(
+        s['nuclide'], os.path.basename(s['wmp_file']), *errors,
+        'yes' if s['negative'] else 'no', '{:.1f}'.format(s['time'])))
+
+
+if __name__ == '__main__':
+  # Command line parsing
+  usage = """usage: %prog [options]"""
+  parser = OptionParser(usage=usage)
+  parser.add_option('-w', '--wmp_directory', dest='wmpdir', default=WMP_PATH,
+                    help="Directory for windowed multipole library. "
+                    "Default: {}".format(WMP_PATH))
+  parser.add_option('-f', '--wmp_file', dest='wmpfile',
+                    help="Specify the wmp file to process. ")
+  parser.add_option('-a', '--ace_directory', dest='acedir', default=ACE_PATH,
+                    help="Directory for ACE library. "
+                    "Default: {}".format(ACE_PATH))
+  parser.add_option('-o', '--out_directory', dest='outdir', default=OUT_PATH,
+                    help="Directory for outputs. "
+                    "Default: {}".format(OUT_PATH))
+  parser.add_option('-t', '--temperature', dest='temp', default=TEMPERATURE,
+                    type='float', help="Temperature to compare. "
+                    "Default: {}".format(TEMPERATURE))
+  parser.add_option('-c', '--cache_directory', dest='cachedir',
+                    help="Directory for caching WMP cross sections between "
+                    "runs. Default: no caching")
+  parser.add_option('--cache_size', dest='cachesize', type='int',
+                    help="Maximum size of the cache in bytes. "
+                    "Default: unlimited")
+  parser.add_option('-j', '--jobs', dest='jobs', default=1, type='int',
+                    help="Number of nuclides validated or plotted in "
+                    "parallel. Default: 1")
+  parser.add_option('-p', '--plot', dest='plot', action='store_true',
+                    default=False, help="Plot the reactions reaching the "
+                    "plot threshold after the comparison. Default: no plots")
+  parser.add_option('-r', '--render', dest='render',
+                    help="Only plot the reactions of an existing results "
+                    "file, without comparing cross sections again.")
+  parser.add_option('--plot_threshold', dest='threshold', default=0.,
+                    type='float', help="Plot only reactions with at least "
+                    "this max. rel. error. Default: 0 (all reactions)")
+  parser.add_option('--dpi', dest='dpi', default=600, type='int',
+                    help="Resolution of the plots. Default: 600")
+  (options, args) = parser.parse_args()
+
+  wmp_dir = options.wmpdir
+  ace_dir = options.acedir
+  out_dir = options.outdir
+  temp = options.temp
+  assert options.jobs >= 1, "number of jobs must be positive"
+
+  if options.render is not None:
+    assert os.path.isfile(options.render), "results file {} not found".format(options.render)
+    if not os.path.exists(out_dir):
+      os.makedirs(out_dir)
+    figfiles = render_results(options.render, out_dir, options.threshold,
+                              options.dpi, options.jobs)
+    print("Plotted {} reactions - {}".format(len(figfiles), time.ctime()))
+    raise SystemExit
+
+  if options.wmpfile is not None:
+    assert os.path.isfile(options.wmpfile), "wmp library {} not found".format(options.wmpfile)
+    wmp_files = [options.wmpfile]
+  else:
+    assert os.path.exists(wmp_dir), "wmp library dir {} not found".format(wmp_dir)
+    wmp_files = glob.glob(os.path.join(wmp_dir, "*.h5"))
+
+  assert os.path.exists(ace_dir), "ace library dir {} not found".format(ace_dir)
+
+  if not os.path.exists(out_dir):
+    os.makedirs(out_dir)
+
+  # Heavy nuclides go first so they don't end up running alone at the end.
+  wmp_files.sort(key=pole_count, reverse=True)
+
+  print("Start validating {} nuclides with {} jobs - {}".format(
+          len(wmp_files), options.jobs, time.ctime()))
+  job_args = (ace_dir, out_dir, temp, options.cachedir, options.cachesize)
+  summaries = []
+  results_file = os.path.join(out_dir, 'validation_{}K.h5'.format(temp))
+  h5file = h5py.File(results_file, 'w')
+  h5file.attrs['temperature'] = temp
+
+  def report(summary):
+    # workers can't share the results file, so only the parent writes to it
+    write_results(summary, h5file)
+    del summary['energy'], summary['results']
+    summaries.append(summary)
+    print("{:>3}/{:<3} Done {} {} in {:.1f} s - {} ".format(
+            len(summaries), len(wmp_files), summary['nuclide'],
+            summary['wmp_file'], summary['time'], time.ctime()))
+    if summary['negative']:
+      print("!!! Found negative cross sections in WMP library!")
+
+  if options.jobs == 1:
+    for wmp_library in wmp_files:
+      report(validate_nuclide(wmp_library, *job_args))
+  else:
+    with ProcessPoolExecutor(max_workers=options.jobs) as executor:
+      futures = [executor.submit(validate_nuclide, wmp_library, *job_args)
+                 for wmp_library in wmp_files]
+      for future in as_completed(futures):
+        report(future.result())
+  h5file.close()
+  print("Results written to {}".format(results_file))
+
+  summary_file = os.path.join(out_dir, 'validation_summary_{}K.md'.format(temp))
+  write_summary(summaries, summary_file, temp)
+  print("Summary written to {}".format(summary_file))
+
+  if options.plot:
+    figfiles = render_results(results_file, out_dir, options.threshold,
+                              options.dpi, options.jobs)
+    print("Plotted {} reactions - {}".format(len(figfiles), time.ctime()))
+
+  print("Done! - {}".format(time.ctime()))